@@ -12,5 +12,22 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'itapps.settings')
+# Route the read-heavy pages to itreporting.async_views; set to 0 to opt out.
+os.environ.setdefault('ITAPPS_ASYNC_VIEWS', '1')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from itreporting import live  # noqa: E402
+
+# The live issue feed holds a request open per client; serve it from
+# itreporting.live directly instead of through the Django handler.
+LIVE_FEED_PATH = reverse('itreporting:issue-feed') if settings.ASYNC_VIEWS else None
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].removeprefix(scope.get('root_path', '')) == LIVE_FEED_PATH:
+        return await live.application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,33 @@
+"""
+The production static files storage, kept apart from itapps/storage.py so
+that the Azure SDK is only imported where it is used.
+"""
+from azure.core.exceptions import ResourceNotFoundError
+from storages.backends.azure_storage import AzureStorage
+
+from itapps.storage import IncrementalManifestMixin
+
+
+class ManifestAzureStorage(IncrementalManifestMixin, AzureStorage):
+    def get_default_settings(self):
+        settings = super().get_default_settings()
+        # Changed originals (css/style.css) are overwritten in place.
+        settings['overwrite_files'] = True
+        return settings
+
+    def read_manifest(self):
+        try:
+            return super().read_manifest()
+        except ResourceNotFoundError:
+            return None
+
+    def list_checksums(self):
+        prefix = self.location.strip('/') + '/' if self.location else ''
+        for blob in self.client.list_blobs(name_starts_with=prefix or None):
+            md5 = blob.content_settings.content_md5
+            yield blob.name[len(prefix):], bytes(md5).hex() if md5 else None
+
+    def get_object_parameters(self, name):
+        parameters = super().get_object_parameters(name)
+        parameters['cache_control'] = self.cache_control_for(name)
+        return parameters
@@ -0,0 +1,14 @@
+from django.db.backends.mysql import base
+
+from itapps.db_pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    def check_raw_connection(self, conn):
+        conn.ping()
+
+    def _set_autocommit(self, autocommit):
+        # Pooled connections usually have the right mode already; skip the
+        # round trip.
+        if self.connection.get_autocommit() != autocommit:
+            super()._set_autocommit(autocommit)
@@ -0,0 +1,8 @@
+from django.db.backends.sqlite3 import base
+
+from itapps.db_pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    def check_raw_connection(self, conn):
+        conn.execute('SELECT 1').close()
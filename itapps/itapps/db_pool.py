@@ -0,0 +1,253 @@
+"""
+Database connection pooling for backends that have none of their own.
+
+Django opens a connection per request (CONN_MAX_AGE=0) and closes it at the
+end; against the Azure MySQL server that is a TCP and TLS handshake every
+time. The backends in itapps.backends mix PooledDatabaseWrapperMixin into
+Django's own so that "opening" takes a connection from a per-alias pool and
+"closing" puts it back.
+
+Configure a pool through OPTIONS['pool'] in DATABASES, e.g.::
+
+    'OPTIONS': {'pool': {'min_size': 2, 'max_size': 10, 'timeout': 10}}
+
+See ConnectionPool for every setting. pool_stats() reports checkouts, wait
+time and timeouts per alias.
+"""
+import collections
+import threading
+import time
+
+from django.db.utils import OperationalError
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of raw DB-API connections.
+
+    min_size connections are opened on first use. At most max_size are open
+    at once; checkout() waits up to ``timeout`` seconds for one to come back
+    and then raises PoolTimeout. On checkout, connections older than
+    ``max_lifetime`` or idle for longer than ``max_idle`` are closed and
+    replaced, and one idle for longer than ``check_interval`` is checked with
+    ``check(conn)`` first.
+    """
+
+    def __init__(self, connect, check, min_size=0, max_size=10, timeout=10.0,
+                 max_lifetime=1800.0, max_idle=300.0, check_interval=5.0):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError('Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1.')
+        self.connect = connect
+        self.check = check
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check_interval = check_interval
+        self._idle = collections.deque()  # (conn, returned_at), most recent last
+        self._created = {}  # id(conn): opened_at
+        self._size = 0
+        self._warmed = False
+        self._cond = threading.Condition()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.opened = 0
+        self.recycled = 0
+        self.failed_checks = 0
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+                'opened': self.opened,
+                'recycled': self.recycled,
+                'failed_checks': self.failed_checks,
+            }
+
+    def checkout(self):
+        """Return (connection, is_new)."""
+        start = time.monotonic()
+        if not self._warmed:
+            self._warm()
+        while True:
+            conn, returned_at, is_new = self._take(start + self.timeout)
+            if is_new:
+                conn = self._open()
+            elif not self._usable(conn, returned_at):
+                self._discard(conn)
+                continue
+            waited = time.monotonic() - start
+            with self._cond:
+                self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            return conn, is_new
+
+    def checkin(self, conn, discard=False):
+        if discard:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), collections.deque()
+        for conn, returned_at in idle:
+            self._discard(conn)
+
+    def _warm(self):
+        with self._cond:
+            if self._warmed:
+                return
+            self._warmed = True
+            missing = max(self.min_size - self._size, 0)
+            self._size += missing
+        opened = []
+        try:
+            for _ in range(missing):
+                opened.append(self._open())
+        finally:
+            with self._cond:
+                self._size -= missing - len(opened)
+                self._idle.extend((conn, time.monotonic()) for conn in opened)
+                self._cond.notify_all()
+
+    def _take(self, deadline):
+        # Returns (conn, returned_at, False) for an idle connection, or
+        # (None, None, True) once a slot for a new connection is reserved.
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    return conn, returned_at, False
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None, True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if not self._idle and self._size >= self.max_size:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f'No database connection became available within {self.timeout}s '
+                            f'(pool size {self.max_size}).'
+                        )
+
+    def _open(self):
+        try:
+            conn = self.connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+            self.opened += 1
+        return conn
+
+    def _usable(self, conn, returned_at):
+        now = time.monotonic()
+        opened_at = self._created.get(id(conn), now)
+        if now - opened_at > self.max_lifetime or now - returned_at > self.max_idle:
+            with self._cond:
+                self.recycled += 1
+            return False
+        if now - returned_at > self.check_interval:
+            try:
+                self.check(conn)
+            except Exception:
+                with self._cond:
+                    self.failed_checks += 1
+                return False
+        return True
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._created.pop(id(conn), None)
+            self._size -= 1
+            self._cond.notify()
+
+
+def get_pool(alias, factory):
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = factory()
+        return _pools[alias]
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
+
+class PooledDatabaseWrapperMixin:
+    """Mix into a backend's DatabaseWrapper; subclasses implement check_raw_connection()."""
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def pool_options(self):
+        return dict(self.settings_dict['OPTIONS'].get('pool') or {})
+
+    def get_pool(self, conn_params):
+        return get_pool(self.alias, lambda: ConnectionPool(
+            connect=lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params),
+            check=self.check_raw_connection,
+            **self.pool_options(),
+        ))
+
+    def check_raw_connection(self, conn):
+        raise NotImplementedError
+
+    def get_new_connection(self, conn_params):
+        conn, self.pool_connection_is_new = self.get_pool(conn_params).checkout()
+        return conn
+
+    def init_connection_state(self):
+        # Session state set up here survives on the pooled connection.
+        if self.pool_connection_is_new:
+            super().init_connection_state()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        broken = self.errors_occurred or self.in_atomic_block
+        if not broken and not self.get_autocommit():
+            try:
+                self.connection.rollback()
+            except Exception:
+                broken = True
+        _pools[self.alias].checkin(self.connection, discard=broken)
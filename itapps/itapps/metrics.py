@@ -0,0 +1,270 @@
+"""
+Per-view request metrics in Prometheus text format.
+
+MetricsMiddleware times every request and labels it with the resolved URL
+name (``itreporting:report``, ``profile``, ...). SQL statements are counted
+and timed by record_query(), an execute wrapper installed once on every
+database connection. Template rendering is timed by the TimedDjangoTemplates
+backend. Both report into the current request's RequestTrace through a
+context variable, so they also work for async views, whose queries run on
+another thread. Everything goes into in-process histograms that /metrics
+renders along with the connection pool counters. Each worker process keeps
+its own numbers.
+
+With settings.METRICS_TRACE_SAMPLE_RATE above 0, that fraction of requests
+also keeps every SQL statement, and a sampled request slower than
+settings.METRICS_SLOW_REQUEST_SECONDS is logged with them. Unsampled requests
+only update counters.
+"""
+import bisect
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.template.backends.django import DjangoTemplates
+from django.utils.crypto import constant_time_compare
+
+from itapps import db_pool
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+_trace = contextvars.ContextVar('itapps_request_trace', default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class HistogramFamily:
+    def __init__(self, name, documentation, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, view):
+        child = self._children.get(view)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(view, Histogram(self.buckets))
+        return child
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for view, histogram in sorted(self._children.items()):
+            counts, total, count = histogram.snapshot()
+            label = f'view="{_escape(view)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                lines.append(f'{self.name}_bucket{{{label},le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {total}')
+            lines.append(f'{self.name}_count{{{label}}} {count}')
+        return lines
+
+
+REQUEST_SECONDS = HistogramFamily('itapps_request_duration_seconds', 'Wall time per request.')
+SQL_QUERIES = HistogramFamily('itapps_request_sql_queries', 'SQL statements per request.', QUERY_COUNT_BUCKETS)
+SQL_SECONDS = HistogramFamily('itapps_request_sql_duration_seconds', 'Time spent in SQL per request.')
+TEMPLATE_SECONDS = HistogramFamily('itapps_request_template_duration_seconds', 'Template render time per request.')
+HISTOGRAMS = (REQUEST_SECONDS, SQL_QUERIES, SQL_SECONDS, TEMPLATE_SECONDS)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestTrace:
+    __slots__ = ('queries', 'sql_seconds', 'template_seconds', 'rendering', 'statements')
+
+    def __init__(self, sampled):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.rendering = False
+        self.statements = [] if sampled else None
+
+
+def record_query(execute, sql, params, many, context):
+    trace = _trace.get()
+    if trace is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        trace.queries += 1
+        trace.sql_seconds += elapsed
+        if trace.statements is not None:
+            trace.statements.append((elapsed, sql))
+
+
+def install_query_recorder(connection, **kwargs):
+    # First in the list: execute_wrapper() blocks (see itapps/querybudget.py)
+    # pop the last wrapper on exit, and may be open when a connection is made.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+connection_created.connect(install_query_recorder, dispatch_uid='itapps.metrics')
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'METRICS_TRACE_SAMPLE_RATE', 0.0)
+        self.slow_seconds = getattr(settings, 'METRICS_SLOW_REQUEST_SECONDS', 1.0)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trace, start = self.start()
+        token = _trace.set(trace)
+        try:
+            response = self.get_response(request)
+        finally:
+            _trace.reset(token)
+        self.finish(request, response, trace, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        trace, start = self.start()
+        token = _trace.set(trace)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _trace.reset(token)
+        self.finish(request, response, trace, time.perf_counter() - start)
+        return response
+
+    def start(self):
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        return RequestTrace(sampled), time.perf_counter()
+
+    def finish(self, request, response, trace, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        REQUEST_SECONDS.labels(view).observe(elapsed)
+        SQL_QUERIES.labels(view).observe(trace.queries)
+        SQL_SECONDS.labels(view).observe(trace.sql_seconds)
+        TEMPLATE_SECONDS.labels(view).observe(trace.template_seconds)
+        if trace.statements is not None and elapsed >= self.slow_seconds:
+            self.log_slow(request, response, view, trace, elapsed)
+
+    def log_slow(self, request, response, view, trace, elapsed):
+        slowest = sorted(trace.statements, key=lambda item: item[0], reverse=True)[:10]
+        statements = ''.join(f'\n  {seconds * 1000:8.1f} ms  {sql[:500]}' for seconds, sql in slowest)
+        logger.warning(
+            'Slow request %s %s (%s, %s): %.0f ms total, %d SQL statements in %.0f ms, '
+            'templates %.0f ms. Slowest statements:%s',
+            request.method, request.get_full_path(), view, response.status_code, elapsed * 1000,
+            trace.queries, trace.sql_seconds * 1000, trace.template_seconds * 1000, statements,
+        )
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        trace = _trace.get()
+        # Only the outermost render is timed; templates rendered from inside
+        # another one (crispy forms, inclusion tags) are part of its time.
+        if trace is None or trace.rendering:
+            return self.template.render(context, request)
+        trace.rendering = True
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            trace.rendering = False
+            trace.template_seconds += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+def pool_exposition():
+    stats = db_pool.pool_stats()
+    metrics = [
+        ('itapps_db_pool_connections', 'gauge', 'Open pooled connections.', 'size'),
+        ('itapps_db_pool_connections_in_use', 'gauge', 'Pooled connections checked out.', 'in_use'),
+        ('itapps_db_pool_checkouts_total', 'counter', 'Connections handed out.', 'checkouts'),
+        ('itapps_db_pool_timeouts_total', 'counter', 'Checkouts that gave up waiting.', 'timeouts'),
+        ('itapps_db_pool_wait_seconds_total', 'counter', 'Time spent waiting for a connection.', 'wait_seconds_total'),
+        ('itapps_db_pool_wait_seconds_max', 'gauge', 'Longest wait for a connection.', 'wait_seconds_max'),
+        ('itapps_db_pool_opened_total', 'counter', 'Connections opened.', 'opened'),
+        ('itapps_db_pool_recycled_total', 'counter', 'Connections closed for age or idleness.', 'recycled'),
+        ('itapps_db_pool_failed_checks_total', 'counter', 'Connections that failed a health check.', 'failed_checks'),
+    ]
+    lines = []
+    for name, kind, documentation, key in metrics:
+        lines += [f'# HELP {name} {documentation}', f'# TYPE {name} {kind}']
+        lines += [f'{name}{{alias="{_escape(alias)}"}} {values[key]}' for alias, values in sorted(stats.items())]
+    return lines
+
+
+def exposition():
+    lines = []
+    for family in HISTOGRAMS:
+        lines += family.exposition()
+    lines += pool_exposition()
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; needs settings.METRICS_TOKEN as a bearer token, or staff."""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    authorization = request.headers.get('Authorization', '')
+    if token:
+        allowed = constant_time_compare(authorization, f'Bearer {token}')
+    else:
+        allowed = settings.DEBUG or request.user.is_staff
+    if not allowed:
+        raise PermissionDenied
+    return HttpResponse(exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,77 @@
+"""
+Per-view SQL query budgets.
+
+Wrap a function view with ``@query_budget(n)`` or mix ``QueryBudgetMixin``
+into a class-based view and set ``query_budget = n``. Template responses are
+rendered inside the budget so that lazy lookups made from templates (the
+usual source of N+1 queries) are counted too. When a view goes over budget,
+``QueryBudgetExceeded`` is raised if ``settings.QUERY_BUDGET_STRICT`` is on,
+otherwise a warning is logged.
+
+A streaming response's body runs after the view has returned, so its queries
+would not be counted; streaming views are left without a budget.
+"""
+import functools
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+# Transaction control, not queries. Savepoints also depend on whether the view
+# runs inside an outer transaction, as it does under TestCase.
+SAVEPOINT_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(SAVEPOINT_STATEMENTS):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def run_with_budget(budget, name, view, request, *args, **kwargs):
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)) and not response.is_rendered:
+            response.render()
+    response.query_count = counter.count
+    response.query_budget = budget
+    if counter.count > budget:
+        message = (f'{name} ran {counter.count} SQL queries for {request.method} '
+                   f'{request.path}, over its budget of {budget}.')
+        if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    return response
+
+
+def query_budget(budget):
+    def decorator(view):
+        name = getattr(view, '__qualname__', repr(view))
+
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            return run_with_budget(budget, name, view, request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+class QueryBudgetMixin:
+    query_budget = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.query_budget is None:
+            return super().dispatch(request, *args, **kwargs)
+        return run_with_budget(self.query_budget, type(self).__name__,
+                               super().dispatch, request, *args, **kwargs)
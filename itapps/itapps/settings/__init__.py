@@ -0,0 +1,36 @@
+"""
+Django settings for itapps project, in two profiles picked by ITAPPS_PROFILE:
+
+- production: Azure Database for MySQL and Azure Blob Storage, configured
+  from the AZURE_DB_* and AZURE_SA_* environment variables.
+- local: a SQLite file and the local filesystem, with DEBUG on; needs no
+  credentials, for development, tests and benchmarks.
+
+Without ITAPPS_PROFILE, Azure App Service (which sets WEBSITE_HOSTNAME) gets
+production, and "manage.py runserver" and "manage.py test" get local.
+Anything else fails to start rather than guess: a server that silently got
+local would run with DEBUG on and an empty SQLite database.
+"""
+import os
+import sys
+
+from django.core.exceptions import ImproperlyConfigured
+
+# Commands that get the local profile without ITAPPS_PROFILE.
+LOCAL_COMMANDS = ('runserver', 'test')
+
+PROFILE = os.environ.get('ITAPPS_PROFILE')
+if not PROFILE:
+    if os.environ.get('WEBSITE_HOSTNAME'):
+        PROFILE = 'production'
+    elif len(sys.argv) > 1 and sys.argv[1] in LOCAL_COMMANDS:
+        PROFILE = 'local'
+    else:
+        raise ImproperlyConfigured('Set ITAPPS_PROFILE to "production" or "local".')
+
+if PROFILE == 'production':
+    from .production import *  # noqa: F401,F403
+elif PROFILE == 'local':
+    from .local import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(f'Unknown ITAPPS_PROFILE {PROFILE!r}; use "production" or "local".')
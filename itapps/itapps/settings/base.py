@@ -0,0 +1,203 @@
+"""
+Settings shared by the production and local profiles (see __init__.py).
+
+Generated by 'django-admin startproject' using Django 5.2.7.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.2/ref/settings/
+"""
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get('SECRET_KEY', '030415')
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'itreporting', 
+    'users.apps.UsersConfig',
+    'crispy_forms',
+    'crispy_bootstrap4',
+]
+
+MIDDLEWARE = [
+    'itapps.metrics.MetricsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'itapps.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'itapps.metrics.TimedDjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'itapps.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+
+# Set by the profiles. Both go through the pooled backends in itapps/backends
+# (see itapps/db_pool.py); CONN_MAX_AGE stays 0 so that each request hands its
+# connection back to the pool when it finishes.
+
+
+# Cache
+# Local memory is per process; point ITAPPS_CACHE_DIR at a shared directory
+# when running several workers so that invalidations reach all of them.
+
+if os.environ.get('ITAPPS_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['ITAPPS_CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'itapps',
+        }
+    }
+
+# Logged-in users (password hashes included) are only ever kept in the memory
+# of the worker that loaded them; the default cache holds a stamp per user
+# that invalidates them everywhere. See users/backends.py.
+CACHES['users'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'itapps-users',
+}
+
+ITREPORTING_CACHE_TIMEOUT = 300
+
+# archive_issues moves issues older than this out of the live Issue table.
+ITREPORTING_ARCHIVE_AFTER_DAYS = 365
+
+# Built by the prerender_pages command; see itreporting/prerender.py.
+ITREPORTING_PRERENDER_ROOT = os.environ.get('ITAPPS_PRERENDER_ROOT', BASE_DIR / 'prerendered')
+ITREPORTING_PRERENDER_MAX_AGE = 86400
+
+# New issues are queued and written in batches; similar reports of the same
+# room and type within the window are counted on one issue. See
+# itreporting/ingest.py.
+ITREPORTING_INGEST_QUEUE_SIZE = 1000
+ITREPORTING_INGEST_BATCH_SIZE = 200
+ITREPORTING_COALESCE_WINDOW = 900
+ITREPORTING_COALESCE_SIMILARITY = 0.5
+
+# Open live feed streams per ASGI worker; see itreporting/live.py.
+ITREPORTING_LIVE_MAX_CLIENTS = 10000
+
+# Sessions and the logged-in user (with their profile) are read from the
+# caches above, so that authenticated requests do not start with two or three
+# queries; see users/backends.py. Sessions are still written through to the
+# database.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = 300
+
+# Serve the read-heavy itreporting pages from async views. itapps/asgi.py
+# turns this on; WSGI deployments keep the sync views.
+ASYNC_VIEWS = os.environ.get('ITAPPS_ASYNC_VIEWS') == '1'
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.2/howto/static-files/
+
+# STATIC_URL = '/static/' (OLD STATIC)
+# STORAGES and the static and media URLs are set by the profiles.
+
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+CRISPY_ALLOWED_TEMPLATE_PACKS = 'bootstrap4'
+CRISPY_TEMPLATE_PACK = 'bootstrap4'
+LOGIN_REDIRECT_URL = 'itreporting:home'
+LOGIN_URL = 'login' #Repalced with the line 134 below 
+#MEDIA_ROOT = BASE_DIR / 'media' (OLD)
+#MEDIA_URL = '/media/' (OLD)
+LOGIN_URL = 'itreporting:home'
+
+# Profile image thumbnails (see users/thumbnails.py).
+PROFILE_THUMBNAIL_SIZE = 160
+PROFILE_THUMBNAIL_WORKERS = 2
+
+# The admin's roster upload hashes passwords inside the request, at about half
+# a second each per CPU; larger rosters go through "manage.py
+# provision_students" so the request stays inside gunicorn's 30 s timeout.
+PROVISION_ADMIN_MAX_PASSWORDS = 50
+
+# Request metrics, served at /metrics (see itapps/metrics.py). Sampled requests
+# slower than METRICS_SLOW_REQUEST_SECONDS are logged with their SQL.
+METRICS_TOKEN = os.environ.get('ITAPPS_METRICS_TOKEN')
+METRICS_TRACE_SAMPLE_RATE = float(os.environ.get('ITAPPS_TRACE_SAMPLE_RATE', 0))
+METRICS_SLOW_REQUEST_SECONDS = 1.0
@@ -0,0 +1,40 @@
+"""
+Local settings: a SQLite file and the local filesystem, no Azure credentials.
+"""
+import os
+
+from .base import *  # noqa: F401,F403
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = []
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'itapps.backends.sqlite3',
+        'NAME': os.environ.get('ITAPPS_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        'OPTIONS': {
+            'pool': {'max_size': int(os.environ.get('ITAPPS_DB_POOL_SIZE', 5))},
+            # Take the write lock when a transaction starts, so that
+            # concurrent requests wait for it (up to the timeout) instead
+            # of failing with "database is locked" when they first write.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    }
+}
+
+# Uploaded media and collected static files stay on the local filesystem.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'itapps.storage.LocalManifestStorage'},
+}
+MEDIA_ROOT = os.environ.get('ITAPPS_MEDIA_ROOT', BASE_DIR / 'media')
+MEDIA_URL = '/media/'
+STATIC_ROOT = os.environ.get('ITAPPS_STATIC_ROOT', BASE_DIR / 'staticfiles')
+STATIC_URL = '/static/'
+
+# Raise instead of logging when a view goes over its SQL query budget
+# (see itapps/querybudget.py).
+QUERY_BUDGET_STRICT = DEBUG
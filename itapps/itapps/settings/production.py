@@ -0,0 +1,81 @@
+"""
+Production settings: Azure Database for MySQL and Azure Blob Storage.
+"""
+import os
+
+from .base import *  # noqa: F401,F403
+
+WEBSITE_HOSTNAME = os.environ.get('WEBSITE_HOSTNAME')
+
+DEBUG = False
+
+ALLOWED_HOSTS = [WEBSITE_HOSTNAME] if WEBSITE_HOSTNAME else []
+
+CSRF_TRUSTED_ORIGINS = [f'https://{WEBSITE_HOSTNAME}'] if WEBSITE_HOSTNAME else []
+
+# Parse each template once per process. Django already wraps the default
+# loaders in the cached loader and resets it when a template changes under
+# runserver; outside DEBUG, name the cached loader explicitly.
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'itapps.backends.mysql',
+        'NAME': os.environ['AZURE_DB_NAME'],
+        'HOST': os.environ['AZURE_DB_HOST'],
+        'PORT': os.environ['AZURE_DB_PORT'],
+        'USER': os.environ['AZURE_DB_USER'],
+        'PASSWORD': os.environ['AZURE_DB_PASSWORD'],
+        'OPTIONS': {
+            'ssl': {
+                'ca': '/etc/ssl/certs/ca-certificates.crt',
+            },
+            'pool': {
+                'min_size': 2,
+                'max_size': int(os.environ.get('ITAPPS_DB_POOL_SIZE', 10)),
+                'timeout': 10,
+                # Azure drops connections idle for about four minutes.
+                'max_idle': 180,
+                'max_lifetime': 1800,
+                'check_interval': 5,
+            },
+        },
+    }
+}
+
+AZURE_SA_NAME = os.environ['AZURE_SA_NAME']
+AZURE_SA_KEY = os.environ['AZURE_SA_KEY']
+
+# The Azure SDK is imported when a storage is first used, not at startup.
+STORAGES = {
+    "default": {
+        "BACKEND": "storages.backends.azure_storage.AzureStorage",
+        "OPTIONS": {
+            "account_name": AZURE_SA_NAME,
+            "account_key": AZURE_SA_KEY,
+            "azure_container": "media",
+        },
+    },
+    "staticfiles": {
+        "BACKEND": "itapps.azure_storage.ManifestAzureStorage",
+        "OPTIONS": {
+            "account_name": AZURE_SA_NAME,
+            "account_key": AZURE_SA_KEY,
+            "azure_container": "static",
+        },
+    },
+}
+
+STATIC_URL = f'https://{AZURE_SA_NAME}.blob.core.windows.net/static/'
+
+MEDIA_URL = f'https://{AZURE_SA_NAME}.blob.core.windows.net/media/'
+
+# Raise instead of logging when a view goes over its SQL query budget
+# (see itapps/querybudget.py).
+QUERY_BUDGET_STRICT = DEBUG
@@ -1,12 +0,0 @@
-from django.db.models.signals import post_save
-from django.contrib.auth.models import User
-from django.dispatch import receiver
-from users.models import Profile
-
-@receiver(post_save, sender=User)
-
-def create_profile(sender, instance, created, **kwargs):
-
-    if created:
-
-     Profile.objects.create(user=instance)
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Static file storages with content-hashed names that can be cached forever.
+
+Both storages keep Django's manifest (staticfiles.json), which is read once per
+process, so {% static %} lookups never touch the network. collectstatic checks
+each file against a checksum inventory of the destination, listed once up
+front, and uploads only new or changed content. Hashed copies get an immutable
+Cache-Control header; the unhashed originals and the manifest get a short one.
+
+ManifestAzureStorage (in itapps/azure_storage.py, so that only the
+production profile imports the Azure SDK) is used in production.
+LocalManifestStorage is the same thing on the local filesystem, for the local
+profile.
+"""
+import hashlib
+import logging
+import os
+import re
+
+from django.contrib.staticfiles.storage import ManifestFilesMixin, ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+# HashedFilesMixin names copies "<root>.<12 hex digits><ext>".
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}(\.[^./]+)?$')
+
+
+def file_md5(content):
+    digest = hashlib.md5()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in iter(lambda: content.read(64 * 1024), b''):
+        digest.update(chunk.encode() if isinstance(chunk, str) else chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+class IncrementalManifestMixin(ManifestFilesMixin):
+    immutable_cache_control = 'public, max-age=31536000, immutable'
+    default_cache_control = 'public, max-age=300'
+
+    def __init__(self, *args, **kwargs):
+        self._inventory = None
+        self._pending_deletes = set()
+        self._pending_saves = None
+        self.uploaded = []
+        self.unchanged = 0
+        super().__init__(*args, **kwargs)
+
+    def list_checksums(self):
+        """Yield (name, md5 hex digest or None) for every stored file."""
+        raise NotImplementedError
+
+    def inventory(self):
+        if self._inventory is None:
+            self._inventory = dict(self.list_checksums())
+        return self._inventory
+
+    def cache_control_for(self, name):
+        if HASHED_NAME.search(name):
+            return self.immutable_cache_control
+        return self.default_cache_control
+
+    def exists(self, name):
+        if self._pending_saves and name in self._pending_saves:
+            return True
+        return name in self.inventory() and name not in self._pending_deletes
+
+    def get_modified_time(self, name):
+        # collectstatic re-copies files with a newer source modification
+        # time, which every fresh checkout has; _save() compares content
+        # checksums instead.
+        raise NotImplementedError
+
+    def delete(self, name):
+        # Held back until post_process() finishes, so that a file deleted and
+        # saved again with the same content is never uploaded.
+        if self._pending_saves:
+            self._pending_saves.pop(name, None)
+        if name in self.inventory():
+            self._pending_deletes.add(name)
+
+    def _save(self, name, content):
+        digest = file_md5(content)
+        self._pending_deletes.discard(name)
+        if self.inventory().get(name) == digest:
+            self.unchanged += 1
+            return name
+        if self._pending_saves is not None and HASHED_NAME.search(name):
+            # CSS files are hashed over several passes and the intermediate
+            # copies deleted again; keep new copies back until the end.
+            self._pending_saves[name] = ContentFile(content.read())
+            return name
+        return self._upload(name, content, digest)
+
+    def _upload(self, name, content, digest):
+        name = super()._save(name, content)
+        self._inventory[name] = digest
+        self.uploaded.append(name)
+        return name
+
+    def post_process(self, *args, **kwargs):
+        self._pending_saves = {}
+        try:
+            yield from super().post_process(*args, **kwargs)
+            pending, self._pending_saves = self._pending_saves, None
+            if not kwargs.get('dry_run'):
+                for name, content in pending.items():
+                    self._upload(name, content, file_md5(content))
+                for name in sorted(self._pending_deletes):
+                    super().delete(name)
+                    self._inventory.pop(name, None)
+                self._pending_deletes.clear()
+        finally:
+            self._pending_saves = None
+        logger.info('Static files: %d uploaded, %d unchanged.', len(self.uploaded), self.unchanged)
+
+
+class LocalManifestStorage(IncrementalManifestMixin, ManifestStaticFilesStorage):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(*args, **kwargs)
+
+    def list_checksums(self):
+        if not os.path.isdir(self.location):
+            return
+        for root, dirs, files in os.walk(self.location):
+            for filename in files:
+                path = os.path.join(root, filename)
+                with open(path, 'rb') as content:
+                    yield os.path.relpath(path, self.location).replace(os.sep, '/'), file_md5(content)
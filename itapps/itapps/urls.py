@@ -20,14 +20,17 @@ from django.conf.urls.static import static
 from django.urls import path, include
 from users import views
 from django.contrib.auth import views as auth_views 
+from itapps.metrics import metrics_view
+from itapps.querybudget import query_budget
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('itreporting/', include('itreporting.urls')),
     path('register/',views.register, name='register'), 
-    path('login/',auth_views.LoginView.as_view(template_name='users/login.html'),name='login'),
-    path('logout/', auth_views.LogoutView.as_view(template_name='users/logout.html'), name='logout'),
+    path('login/',query_budget(6)(auth_views.LoginView.as_view(template_name='users/login.html')),name='login'),
+    path('logout/', query_budget(5)(auth_views.LogoutView.as_view(template_name='users/logout.html')), name='logout'),
     path('profile', views.profile, name='profile'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -1,6 +1,129 @@
-from django.contrib import admin
-from itreporting.models import Issue
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import connections
+from django.template.response import TemplateResponse
+from django.utils.functional import cached_property
 
-admin.site.register(Issue)
+from itreporting import bulk
+from itreporting.models import ArchivedIssue, Issue
 
-# Register your models here.
+
+class ReassignForm(forms.Form):
+    username = forms.CharField(label='New author')
+
+    def clean_username(self):
+        username = self.cleaned_data['username']
+        self.author = User.objects.filter(username=username).first()
+        if self.author is None:
+            raise forms.ValidationError(f'There is no user "{username}".')
+        return username
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Takes the row count of an unfiltered changelist from MySQL's table
+    statistics instead of COUNT(*), which scans the whole table. The estimate
+    is only used above ESTIMATE_FROM rows, where being a page or two out
+    matters less than a slow first page.
+    """
+    ESTIMATE_FROM = 100_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'mysql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT TABLE_ROWS FROM information_schema.TABLES '
+                    'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] and row[0] >= self.ESTIMATE_FROM:
+                return row[0]
+        return super().count
+
+
+@admin.register(Issue)
+class IssueAdmin(admin.ModelAdmin):
+    list_display = ('id', 'type', 'room', 'urgent', 'author', 'date_submitted', 'reporter_count', 'summary')
+    list_display_links = ('id', 'type')
+    list_select_related = ('author',)
+    # Backed by issue_urgent_type_date_idx and issue_date_id_idx.
+    list_filter = ('urgent', 'type', 'date_submitted')
+    ordering = ('-date_submitted', '-id')
+    autocomplete_fields = ('author',)
+    readonly_fields = ('summary', 'reporter_count')
+    # Skip the second COUNT(*) over the whole table on filtered pages.
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    list_per_page = 50
+    actions = ('mark_urgent', 'mark_not_urgent', 'reassign', 'delete_issues')
+
+    def get_actions(self, request):
+        # delete_selected collects and deletes the issues one by one.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description='Mark selected issues as urgent', permissions=['change'])
+    def mark_urgent(self, request, queryset):
+        count = bulk.set_urgent(queryset, True)
+        self.message_user(request, f'{count} issues marked as urgent.', messages.SUCCESS)
+
+    @admin.action(description='Mark selected issues as not urgent', permissions=['change'])
+    def mark_not_urgent(self, request, queryset):
+        count = bulk.set_urgent(queryset, False)
+        self.message_user(request, f'{count} issues marked as not urgent.', messages.SUCCESS)
+
+    @admin.action(description='Reassign selected issues to another user', permissions=['change'])
+    def reassign(self, request, queryset):
+        form = ReassignForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            count = bulk.reassign(queryset, form.author)
+            self.message_user(request, f'{count} issues reassigned to {form.author}.', messages.SUCCESS)
+            return None
+        return self.confirm(request, queryset, 'reassign', 'Reassign issues', form)
+
+    @admin.action(description='Delete selected issues', permissions=['delete'])
+    def delete_issues(self, request, queryset):
+        if 'apply' in request.POST:
+            count = bulk.delete(queryset)
+            self.message_user(request, f'{count} issues deleted.', messages.SUCCESS)
+            return None
+        return self.confirm(request, queryset, 'delete_issues', 'Delete issues')
+
+    def confirm(self, request, queryset, action, title, form=None):
+        context = dict(
+            self.admin_site.each_context(request),
+            title=title,
+            opts=self.model._meta,
+            action=action,
+            form=form,
+            count=queryset.count(),
+            selected=request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            select_across=request.POST.get('select_across', '0'),
+        )
+        return TemplateResponse(request, 'admin/itreporting/issue/bulk_action.html', context)
+
+
+@admin.register(ArchivedIssue)
+class ArchivedIssueAdmin(admin.ModelAdmin):
+    list_display = ('id', 'type', 'room', 'urgent', 'author', 'date_submitted', 'archived_at')
+    list_select_related = ('author',)
+    list_filter = ('urgent', 'type')
+    ordering = ('-date_submitted', '-id')
+    raw_id_fields = ('author',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
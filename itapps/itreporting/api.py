@@ -0,0 +1,153 @@
+"""
+Read-only JSON API for issues, for kiosk screens and scripts.
+
+GET api/issues/ lists issues newest first and takes the report page's filters,
+``cursor`` and ``page_size`` (up to 100). GET api/issues/<pk> returns one
+issue. ``?fields=id,room,urgent`` loads only those columns (only()) and
+``?omit=details,description`` skips the large text columns (defer()); the
+short ``summary`` is usually enough for a list.
+
+Responses carry an ETag and Last-Modified built from the IssuesVersion row,
+which is bumped after every issue write. It lives in the database, so every
+worker gives the same answer. Checking it takes one primary key lookup, and
+a client polling with If-None-Match or If-Modified-Since gets 304 Not
+Modified without the page being loaded.
+"""
+import hashlib
+
+from django.http import Http404, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_safe
+
+from itapps.querybudget import query_budget
+from itreporting.forms import IssueFilterForm
+from itreporting.models import Issue, IssuesVersion
+from itreporting.pagination import CursorPaginator
+
+FIELDS = ('id', 'type', 'room', 'urgent', 'summary', 'details', 'description', 'date_submitted', 'author',
+          'reporter_count')
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class FieldError(ValueError):
+    pass
+
+
+def _names(value):
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = sorted(set(names) - set(FIELDS))
+    if unknown:
+        raise FieldError(f'Unknown fields: {", ".join(unknown)}. Choose from: {", ".join(FIELDS)}.')
+    return names
+
+
+def selected_fields(request):
+    """Return (fields to output, queryset loading just those)."""
+    fields, omit = request.GET.get('fields'), request.GET.get('omit')
+    if fields and omit:
+        raise FieldError('Use either fields or omit, not both.')
+    queryset = Issue.objects.all()
+    if fields:
+        names = ['id'] + [name for name in _names(fields) if name != 'id']
+        # The cursor is built from date_submitted and id.
+        columns = {name for name in names if name != 'author'} | {'date_submitted'}
+        if 'author' in names:
+            return names, queryset.select_related('author').only(*columns, 'author__username')
+        return names, queryset.only(*columns)
+    omitted = set(_names(omit or '')) - {'id', 'date_submitted'}
+    names = [name for name in FIELDS if name not in omitted]
+    if 'author' in names:
+        queryset = queryset.select_related('author')
+    return names, queryset.defer(*(omitted - {'author'}))
+
+
+def serialize(issue, fields):
+    return {name: issue.author.username if name == 'author' else getattr(issue, name) for name in fields}
+
+
+def error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def issues_version(request):
+    """IssuesVersion.current(), read once per request."""
+    if not hasattr(request, '_issues_version'):
+        request._issues_version = IssuesVersion.current()
+    return request._issues_version
+
+
+def _etag(*parts):
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def list_etag(request):
+    version, changed_at = issues_version(request)
+    return _etag(version, request.get_full_path())
+
+
+def list_last_modified(request):
+    version, changed_at = issues_version(request)
+    return changed_at
+
+
+def detail_etag(request, pk):
+    version, changed_at = issues_version(request)
+    return _etag(version, pk, request.get_full_path())
+
+
+def detail_last_modified(request, pk):
+    version, changed_at = issues_version(request)
+    return changed_at
+
+
+def _revalidate(response):
+    # Clients may keep the response but must check it with us before reuse.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+@query_budget(2)
+@require_safe
+@condition(etag_func=list_etag, last_modified_func=list_last_modified)
+def issue_list(request):
+    try:
+        fields, queryset = selected_fields(request)
+        page_size = int(request.GET.get('page_size', DEFAULT_PAGE_SIZE))
+    except FieldError as exc:
+        return error(str(exc))
+    except ValueError:
+        return error('page_size must be a number.')
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        return error(f'page_size must be between 1 and {MAX_PAGE_SIZE}.')
+    try:
+        page = CursorPaginator(IssueFilterForm(request.GET).filter(queryset), page_size).page(request.GET.get('cursor'))
+    except Http404:
+        return error('Invalid cursor.')
+
+    def link(cursor):
+        if cursor is None:
+            return None
+        query = request.GET.copy()
+        query['cursor'] = cursor
+        return f'{request.path}?{query.urlencode()}'
+
+    return _revalidate(JsonResponse({
+        'results': [serialize(issue, fields) for issue in page],
+        'next': link(page.next_cursor),
+        'previous': link(page.previous_cursor),
+    }))
+
+
+@query_budget(2)
+@require_safe
+@condition(etag_func=detail_etag, last_modified_func=detail_last_modified)
+def issue_detail(request, pk):
+    try:
+        fields, queryset = selected_fields(request)
+    except FieldError as exc:
+        return error(str(exc))
+    issue = queryset.filter(pk=pk).first()
+    if issue is None:
+        return error('Issue not found.', status=404)
+    return _revalidate(JsonResponse(serialize(issue, fields)))
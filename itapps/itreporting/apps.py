@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ItreportingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'itreporting'
+
+    def ready(self):
+        from itreporting.signals import ensure_search_schema
+        post_migrate.connect(ensure_search_schema, sender=self)
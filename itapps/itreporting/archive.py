@@ -0,0 +1,59 @@
+"""
+Moving old issues out of the live Issue table.
+
+Lists, counts and index upkeep on insert only ever touch the Issue table, so
+old issues are copied to ArchivedIssue, keeping their ids, and deleted from
+Issue in batches, each in its own transaction. The detail page still finds
+them by id. Archived issues stay in the IssueStat rollup and in each author's
+total_issues, but no longer count as open.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from itreporting.bulk import delete_rows
+from itreporting.models import ArchivedIssue, Issue
+from itreporting.signals import issues_archived
+
+COPIED_FIELDS = (
+    'id', 'type', 'room', 'urgent', 'details', 'summary', 'date_submitted', 'description', 'author_id',
+    'reporter_count',
+)
+
+
+def archive_after_days():
+    return getattr(settings, 'ITREPORTING_ARCHIVE_AFTER_DAYS', 365)
+
+
+def cutoff(days=None):
+    days = archive_after_days() if days is None else days
+    return timezone.now() - datetime.timedelta(days=days)
+
+
+def archivable(before):
+    return Issue.objects.filter(date_submitted__lt=before)
+
+
+def archive_batch(before, batch_size=1000):
+    """Archive the oldest ``batch_size`` issues submitted before ``before``; returns how many."""
+    with transaction.atomic():
+        issues = list(archivable(before).select_for_update().order_by('date_submitted', 'id')[:batch_size])
+        if not issues:
+            return 0
+        now = timezone.now()
+        ArchivedIssue.objects.bulk_create([
+            ArchivedIssue(archived_at=now, **{name: getattr(issue, name) for name in COPIED_FIELDS})
+            for issue in issues
+        ])
+        # One DELETE, with the receivers run in bulk.
+        delete_rows([issue.pk for issue in issues])
+        issues_archived.send(sender=Issue, issues=issues)
+    return len(issues)
+
+
+def archive(before, batch_size=1000):
+    """Archive every issue submitted before ``before``, yielding the size of each batch."""
+    while archived := archive_batch(before, batch_size):
+        yield archived
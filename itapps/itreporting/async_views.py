@@ -0,0 +1,70 @@
+"""
+Async versions of the read-heavy itreporting pages, routed in place of the
+sync views when the site is served over ASGI (see settings.ASYNC_VIEWS).
+
+Templates cannot query the database from an async view, so everything they
+need is loaded first: request.user through auser() and the sidebar issues
+through the async ORM. Query budgets are not applied here; connection
+wrappers are per thread and the async ORM runs queries on another one.
+"""
+from django.http import Http404
+from django.shortcuts import render
+
+from itreporting.cache import acached_response, aissues_page_key, issue_page_key
+from itreporting.forms import IssueFilterForm
+from itreporting.live import feed_context
+from itreporting.pagination import CursorPaginator
+from itreporting.prerender import aserve_prerendered
+from itreporting.templatetags.itreporting_tags import latest_issues_queryset
+from itreporting.views import PostDetailView, PostListView
+
+
+async def _base_context(request):
+    request.user = await request.auser()
+    return {'latest_issues': [issue async for issue in latest_issues_queryset()]}
+
+
+async def home(request):
+    return await aserve_prerendered('home', request, _cached_home)
+
+
+async def _cached_home(request):
+    return await acached_response(request, await aissues_page_key(request), _home)
+
+
+async def _home(request):
+    context = await _base_context(request)
+    context['title'] = 'Welcome'
+    return render(request, 'itreporting/home.html', context)
+
+
+async def report(request):
+    return await acached_response(request, await aissues_page_key(request), _report)
+
+
+async def _report(request):
+    context = await _base_context(request)
+    filter_form = IssueFilterForm(request.GET)
+    paginator = CursorPaginator(filter_form.filter(PostListView.queryset.all()),
+                                PostListView.paginate_by, PostListView.cursor_ordering)
+    page = await paginator.apage(request.GET.get(PostListView.cursor_query_param))
+    context.update(
+        paginator=paginator, page_obj=page, is_paginated=page.has_other_pages(),
+        object_list=page.object_list, issues=page.object_list, filter_form=filter_form,
+        live_feed=True, **feed_context(filter_form, page),
+    )
+    return render(request, PostListView.template_name, context)
+
+
+async def issue_detail(request, pk):
+    return await acached_response(request, issue_page_key(pk), _issue_detail, pk)
+
+
+async def _issue_detail(request, pk):
+    request.user = await request.auser()
+    issue = await PostDetailView.queryset.filter(pk=pk).afirst()
+    if issue is None:
+        issue = await PostDetailView.archive_queryset.filter(pk=pk).afirst()
+    if issue is None:
+        raise Http404('No issue found matching the query')
+    return render(request, PostDetailView.template_name, {'object': issue, 'issue': issue})
@@ -0,0 +1,143 @@
+import asyncio
+import itertools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from itreporting.models import Issue, make_summary
+from itreporting.signals import issues_bulk_created
+from users.models import Profile
+
+TYPES = [value for value, label in Issue._meta.get_field('type').choices]
+ROOMS = [f'{block}{number}' for block in 'ABCDEFGH' for number in range(1, 26)]
+WORDS = ('printer monitor keyboard mouse login password wifi network projector '
+         'screen laptop charger software licence update crash slow email vpn').split()
+
+
+def synthetic_issues(author_ids, count, seed=0, days=365, now=None):
+    """Yield ``count`` unsaved issues spread over the last ``days`` days."""
+    rng = random.Random(seed)
+    now = now or timezone.now()
+    for _ in range(count):
+        details = ' '.join(rng.choices(WORDS, k=rng.randint(8, 40)))
+        yield Issue(
+            type=rng.choice(TYPES),
+            room=rng.choice(ROOMS),
+            urgent=rng.random() < 0.1,
+            details=details,
+            summary=make_summary(details),
+            description=details,
+            author_id=rng.choice(author_ids),
+            date_submitted=now - timedelta(seconds=rng.randrange(days * 86400)),
+        )
+
+
+def bulk_insert(model, objs, batch_size=5000):
+    inserted = 0
+    objs = iter(objs)
+    while batch := list(itertools.islice(objs, batch_size)):
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        inserted += len(batch)
+    return inserted
+
+
+def insert_issues(issues, batch_size=5000):
+    """Bulk insert issues in batches, sending issues_bulk_created for each."""
+    inserted = 0
+    issues = iter(issues)
+    while batch := list(itertools.islice(issues, batch_size)):
+        with transaction.atomic():
+            Issue.objects.bulk_create(batch)
+            issues_bulk_created.send(sender=Issue, issues=batch)
+        inserted += len(batch)
+    return inserted
+
+
+def synthetic_users(count, password_hash, prefix='user'):
+    """Yield ``count`` unsaved users named <prefix>000000, <prefix>000001, ...
+
+    ``password_hash`` comes from make_password(); hashing once keeps this fast.
+    """
+    for i in range(count):
+        yield User(
+            username=f'{prefix}{i:06d}',
+            first_name=f'First{i}',
+            last_name=f'Last{i}',
+            email=f'{prefix}{i:06d}@example.com',
+            password=password_hash,
+        )
+
+
+def create_users(count, password_hash, prefix='user', batch_size=5000):
+    """Bulk insert users and their profiles; returns the new user ids."""
+    bulk_insert(User, synthetic_users(count, password_hash, prefix), batch_size)
+    user_ids = list(User.objects.filter(username__startswith=prefix).order_by('pk').values_list('pk', flat=True))
+    bulk_insert(Profile, (Profile(user_id=pk) for pk in user_ids), batch_size)
+    return user_ids
+
+
+def timed(func, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+
+def _timed_call(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def run_threaded(func, requests, concurrency):
+    """Call ``func(i)`` for i in range(requests) on ``concurrency`` threads.
+
+    Returns the per-call latencies and the wall time of the whole run.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(lambda i: _timed_call(func, i), range(requests)))
+    return latencies, time.perf_counter() - start
+
+
+async def run_async(func, requests, concurrency):
+    """Await ``func(i)`` for i in range(requests), at most ``concurrency`` at once."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await func(i)
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(call(i) for i in range(requests)))
+    return list(latencies), time.perf_counter() - start
+
+
+def summarize(latencies, elapsed):
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
@@ -0,0 +1,70 @@
+"""
+Bulk changes to many issues at once, used by the admin actions.
+
+Saving or deleting issues one at a time runs the stats, counter and cache
+receivers for every row. These functions read the selected rows once (only
+the fields those receivers need), change them with one UPDATE or DELETE per
+batch of BATCH_SIZE ids and send issues_bulk_updated / issues_bulk_deleted,
+whose receivers adjust the stats and counters with a few grouped writes.
+"""
+from django.db import connection, transaction
+
+from itreporting.models import Issue
+from itreporting.signals import issues_bulk_deleted, issues_bulk_updated
+
+# Bounds the id list of each statement (SQLite limits query parameters).
+BATCH_SIZE = 1000
+TRACKED_FIELDS = ('id', 'author', 'date_submitted', 'room', 'type', 'urgent')
+
+
+def _locked(queryset):
+    return list(queryset.select_for_update().order_by('pk').only(*TRACKED_FIELDS))
+
+
+def _batches(issues):
+    for start in range(0, len(issues), BATCH_SIZE):
+        yield [issue.pk for issue in issues[start:start + BATCH_SIZE]]
+
+
+def delete_rows(pks):
+    """
+    Delete the issues with ``pks`` with one DELETE, without loading or
+    signalling them; the caller sends the bulk signal in the same transaction.
+    Nothing references Issue, so there is nothing to cascade to.
+    """
+    table = connection.ops.quote_name(Issue._meta.db_table)
+    column = connection.ops.quote_name(Issue._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({", ".join(["%s"] * len(pks))})', pks)
+        return cursor.rowcount
+
+
+def update(queryset, **changes):
+    """Apply ``changes`` (field attnames) to every issue in ``queryset``; returns the count."""
+    with transaction.atomic():
+        issues = _locked(queryset)
+        for pks in _batches(issues):
+            Issue.objects.filter(pk__in=pks).update(**changes)
+        if issues:
+            issues_bulk_updated.send(sender=Issue, issues=issues, changes=changes)
+    return len(issues)
+
+
+def set_urgent(queryset, urgent):
+    return update(queryset.exclude(urgent=urgent), urgent=urgent)
+
+
+def reassign(queryset, author):
+    return update(queryset.exclude(author=author), author_id=author.pk)
+
+
+def delete(queryset):
+    """Delete every issue in ``queryset``; returns the count."""
+    with transaction.atomic():
+        issues = _locked(queryset)
+        for pks in _batches(issues):
+            # QuerySet.delete() would load and signal every row.
+            delete_rows(pks)
+        if issues:
+            issues_bulk_deleted.send(sender=Issue, issues=issues)
+    return len(issues)
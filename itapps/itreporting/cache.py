@@ -0,0 +1,158 @@
+"""
+Response and template-fragment caching for itreporting pages.
+
+Anonymous GET responses are cached whole. Pages that list issues (including
+every page with the "Latest Issues Reported" sidebar) are keyed on an issues
+version number that changes whenever any issue is saved or deleted; an issue
+detail page and its report row are keyed on the issue itself and deleted when
+that issue changes. See itreporting.signals for the receivers.
+
+The cached version is only shared between workers when the cache is (see
+ITAPPS_CACHE_DIR). Each change also bumps the IssuesVersion row, which the
+API's conditional GETs are checked against.
+"""
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from itreporting.models import IssuesVersion
+
+ISSUES_VERSION_KEY = 'itreporting:issues-version'
+
+
+def cache_timeout():
+    return getattr(settings, 'ITREPORTING_CACHE_TIMEOUT', 300)
+
+
+def issues_version():
+    version = cache.get(ISSUES_VERSION_KEY)
+    if version is None:
+        cache.add(ISSUES_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(ISSUES_VERSION_KEY)
+    return version
+
+
+def bump_issues_version():
+    cache.set(ISSUES_VERSION_KEY, time.time_ns(), None)
+    IssuesVersion.bump()
+
+
+def issue_page_key(pk):
+    return f'itreporting:issue-page:{pk}'
+
+
+async def aissues_version():
+    version = await cache.aget(ISSUES_VERSION_KEY)
+    if version is None:
+        await cache.aadd(ISSUES_VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(ISSUES_VERSION_KEY)
+    return version
+
+
+def _page_key(version, request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'itreporting:page:{version}:{path}'
+
+
+def issues_page_key(request):
+    return _page_key(issues_version(), request)
+
+
+async def aissues_page_key(request):
+    return _page_key(await aissues_version(), request)
+
+
+def invalidate_issue(pk):
+    cache.delete_many([
+        issue_page_key(pk),
+        make_template_fragment_key('issue_row', [pk]),
+        make_template_fragment_key('latest_issues'),
+    ])
+    bump_issues_version()
+
+
+def invalidate_issue_lists():
+    cache.delete(make_template_fragment_key('latest_issues'))
+    bump_issues_version()
+
+
+def invalidate_issue_rows(pks):
+    keys = []
+    for pk in pks:
+        keys += [issue_page_key(pk), make_template_fragment_key('issue_row', [pk])]
+    cache.delete_many(keys)
+    bump_issues_version()
+
+
+def _cacheable_request(request):
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return False
+    # Pending flash messages are rendered into the page exactly once.
+    return 'messages' not in request.COOKIES and '_messages' not in request.session
+
+
+async def _acacheable_request(request):
+    if request.method not in ('GET', 'HEAD') or (await request.auser()).is_authenticated:
+        return False
+    return 'messages' not in request.COOKIES and not await request.session.ahas_key('_messages')
+
+
+def _storable(response):
+    return response.status_code == 200 and not response.cookies and not response.streaming
+
+
+def cached_response(request, key, view, *args, **kwargs):
+    if not _cacheable_request(request):
+        return view(request, *args, **kwargs)
+    cached = cache.get(key)
+    if cached is not None:
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+    else:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)) and not response.is_rendered:
+            response.render()
+        if _storable(response):
+            cache.set(key, (response.content, response['Content-Type']), cache_timeout())
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+async def acached_response(request, key, view, *args, **kwargs):
+    """cached_response() for async views; ``view`` must return a rendered response."""
+    if not await _acacheable_request(request):
+        return await view(request, *args, **kwargs)
+    cached = await cache.aget(key)
+    if cached is not None:
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+    else:
+        response = await view(request, *args, **kwargs)
+        if _storable(response):
+            await cache.aset(key, (response.content, response['Content-Type']), cache_timeout())
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def cache_for_anonymous(key_func=issues_page_key):
+    """Cache a function view's response for anonymous users under key_func(request)."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            return cached_response(request, key_func(request), view, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+class AnonymousCacheMixin:
+    def cache_key(self):
+        return issues_page_key(self.request)
+
+    def dispatch(self, request, *args, **kwargs):
+        return cached_response(request, self.cache_key(), super().dispatch, *args, **kwargs)
@@ -0,0 +1,121 @@
+"""
+Per-author issue counters stored on Profile.
+
+Profile.open_issues, urgent_issues and total_issues are adjusted with F()
+expressions in the same transaction as each Issue write, so "My issues" never
+counts the author's rows. Open issues are those still in the Issue table;
+urgent_issues counts the open ones flagged urgent, and total_issues also
+counts the author's archived issues. reconcile() recomputes the counters from
+the Issue and ArchivedIssue tables to repair any drift (see the
+reconcile_issue_counts command).
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+
+from itreporting.models import ArchivedIssue, Issue
+from users.backends import invalidate_users
+from users.models import Profile
+
+COUNTED_FIELDS = ('author_id', 'urgent')
+COUNTERS = ('open_issues', 'urgent_issues', 'total_issues')
+
+
+def issue_values(issue):
+    return {name: getattr(issue, name) for name in COUNTED_FIELDS}
+
+
+def loaded_values(issue):
+    """The COUNTED_FIELDS of ``issue`` as they are stored, before unsaved edits."""
+    loaded = getattr(issue, '_loaded_values', {})
+    if all(name in loaded for name in COUNTED_FIELDS):
+        return {name: loaded[name] for name in COUNTED_FIELDS}
+    return Issue.objects.filter(pk=issue.pk).values(*COUNTED_FIELDS).first()
+
+
+def deltas_for(values, sign):
+    return {'open_issues': sign, 'total_issues': sign, 'urgent_issues': sign if values['urgent'] else 0}
+
+
+def apply(deltas, batch_size=500):
+    """deltas: {author id: {counter: change}}. One UPDATE per batch of authors."""
+    deltas = {author: changes for author, changes in deltas.items() if any(changes.values())}
+    authors = sorted(deltas)
+    for start in range(0, len(authors), batch_size):
+        batch = authors[start:start + batch_size]
+        updates = {}
+        for name in COUNTERS:
+            whens = [When(user_id=author, then=Value(deltas[author].get(name, 0)))
+                     for author in batch if deltas[author].get(name)]
+            if whens:
+                updates[name] = F(name) + Case(*whens, default=Value(0), output_field=IntegerField())
+        Profile.objects.filter(user_id__in=batch).update(**updates)
+    if authors:
+        # The cached request.user carries the profile (see users.backends).
+        transaction.on_commit(lambda: invalidate_users(authors))
+
+
+def record(issues, sign=1):
+    deltas = defaultdict(Counter)
+    for issue in issues:
+        deltas[issue.author_id].update(deltas_for(issue_values(issue), sign))
+    apply(deltas)
+
+
+def record_change(before, after):
+    if before == after:
+        return
+    deltas = defaultdict(Counter)
+    deltas[before['author_id']].update(deltas_for(before, -1))
+    deltas[after['author_id']].update(deltas_for(after, 1))
+    apply(deltas)
+
+
+def record_changes(issues, changes):
+    """``issues`` as loaded, before one UPDATE applied ``changes`` to all of them."""
+    deltas = defaultdict(Counter)
+    for issue in issues:
+        before = issue_values(issue)
+        after = {**before, **{name: value for name, value in changes.items() if name in COUNTED_FIELDS}}
+        if before != after:
+            deltas[before['author_id']].update(deltas_for(before, -1))
+            deltas[after['author_id']].update(deltas_for(after, 1))
+    apply(deltas)
+
+
+def record_archived(issues):
+    deltas = defaultdict(Counter)
+    for issue in issues:
+        moved = deltas_for(issue_values(issue), -1)
+        moved['total_issues'] = 0
+        deltas[issue.author_id].update(moved)
+    apply(deltas)
+
+
+def reconcile(dry_run=False, batch_size=1000):
+    """Recompute every profile's counters; returns the user ids whose counters were wrong."""
+    zero = dict.fromkeys(COUNTERS, 0)
+    actual = {
+        row['author_id']: row
+        for row in Issue.objects.order_by().values('author_id').annotate(
+            open_issues=Count('id'), urgent_issues=Count('id', filter=Q(urgent=True)), total_issues=Count('id'),
+        )
+    }
+    archived = ArchivedIssue.objects.order_by().values('author_id').annotate(count=Count('id'))
+    for row in archived:
+        counts = actual.setdefault(row['author_id'], dict(zero))
+        counts['total_issues'] += row['count']
+    drifted = []
+    with transaction.atomic():
+        profiles = Profile.objects.select_for_update().only('pk', 'user_id', *COUNTERS).order_by('pk')
+        for profile in profiles.iterator(chunk_size=batch_size):
+            row = actual.get(profile.user_id, zero)
+            if all(getattr(profile, name) == row[name] for name in COUNTERS):
+                continue
+            drifted.append(profile.user_id)
+            if not dry_run:
+                Profile.objects.filter(pk=profile.pk).update(**{name: row[name] for name in COUNTERS})
+        if drifted and not dry_run:
+            transaction.on_commit(lambda: invalidate_users(drifted))
+    return drifted
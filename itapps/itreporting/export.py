@@ -0,0 +1,89 @@
+import csv
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+COLUMNS = ['id', 'type', 'room', 'urgent', 'details', 'description', 'author', 'date_submitted']
+FIELDS = ['id', 'type', 'room', 'urgent', 'details', 'description', 'author__username', 'date_submitted']
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+
+def export_rows(queryset, chunk_size=2000):
+    """
+    Yield value tuples for every issue in ``queryset``, ``chunk_size`` rows
+    per query. Chunks are fetched by primary key range rather than through
+    one long-running cursor, because mysqlclient buffers a whole result set
+    in memory even under QuerySet.iterator().
+    """
+    queryset = queryset.order_by('id').values_list(*FIELDS)
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow(value.isoformat() if hasattr(value, 'isoformat') else value for value in row)
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(COLUMNS, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def encode(lines, buffer_size=64 * 1024):
+    """Join lines into ~buffer_size byte chunks so each write is worth a syscall."""
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzipped(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(queryset, fmt='csv', gzip=False):
+    lines = csv_lines if fmt == 'csv' else jsonl_lines
+    chunks = encode(lines(export_rows(queryset)))
+    return gzipped(chunks) if gzip else chunks
+
+
+async def aexport_stream(queryset, fmt='csv', gzip=False):
+    """
+    export_stream() for responses served over ASGI. Django's ASGI handler
+    reads a sync iterator to the end before it sends anything, so each chunk
+    is produced on the sync thread (where the queries run) and sent before
+    the next one is read.
+    """
+    chunks = export_stream(queryset, fmt, gzip)
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield chunk
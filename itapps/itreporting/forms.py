@@ -0,0 +1,43 @@
+import datetime
+
+from django import forms
+from django.utils import timezone
+
+from itreporting.models import Issue
+
+
+class IssueFilterForm(forms.Form):
+    type = forms.ChoiceField(required=False, choices=[('', 'Any type')] + Issue._meta.get_field('type').choices)
+    urgent = forms.TypedChoiceField(
+        required=False, choices=[('', 'Any'), ('1', 'Urgent'), ('0', 'Not urgent')],
+        coerce=lambda value: value == '1', empty_value=None,
+    )
+    room = forms.CharField(required=False, max_length=100)
+    author = forms.CharField(required=False, max_length=150, label='Reported by')
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def filter(self, queryset):
+        # Invalid fields are dropped from cleaned_data, so a bad value only
+        # disables its own filter instead of the whole form.
+        self.is_valid()
+        data = self.cleaned_data
+        if data.get('type'):
+            queryset = queryset.filter(type=data['type'])
+        if data.get('urgent') is not None:
+            # urgent=True compiles to a bare "WHERE urgent" on SQLite, which
+            # cannot use issue_urgent_type_date_idx; IN compares the value.
+            queryset = queryset.filter(urgent__in=[data['urgent']])
+        if data.get('room'):
+            queryset = queryset.filter(room=data['room'])
+        if data.get('author'):
+            queryset = queryset.filter(author__username=data['author'])
+        if data.get('date_from'):
+            queryset = queryset.filter(date_submitted__gte=_start_of_day(data['date_from']))
+        if data.get('date_to'):
+            queryset = queryset.filter(date_submitted__lt=_start_of_day(data['date_to'] + datetime.timedelta(days=1)))
+        return queryset
+
+
+def _start_of_day(date):
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
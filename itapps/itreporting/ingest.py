@@ -0,0 +1,297 @@
+"""
+Queued, batched issue submission with duplicate-report coalescing.
+
+PostCreateView hands each new issue to submit(), which puts it on a bounded
+in-process queue and waits for the flusher thread to write it. The flusher
+takes everything queued (up to BATCH_SIZE) and writes it in one transaction,
+so while one batch is being written the next one builds up; a lone
+submission is written straight away. submit() only returns once the issue is
+committed: if the flusher has not picked a submission up within WAIT_SECONDS,
+the request takes it back and writes it itself, so nothing that was
+acknowledged is lost when the process exits with submissions still queued.
+
+Within a batch, a submission whose room and type match an issue reported in
+the last COALESCE_WINDOW seconds (or earlier in the same batch), and whose
+details share enough words with it, is added to that issue's reporter_count
+instead of becoming a new row; who reported it, when, and their details are
+appended to the issue's description. The remaining issues are bulk inserted
+and issues_bulk_created is sent.
+
+A submission may carry an idempotency key; the create form sends one per
+rendering. Repeating a key (a double click) returns the first submission's
+issue instead of reporting it again. When the queue is full submit() raises
+Busy.
+"""
+import logging
+import queue
+import re
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Case, F, IntegerField, TextField, Value, When
+from django.utils import timezone
+
+from itreporting import bulk, live
+from itreporting.cache import invalidate_issue_rows
+from itreporting.models import Issue, make_summary
+from itreporting.signals import issues_bulk_created
+
+logger = logging.getLogger(__name__)
+
+# How long a request waits for the flusher to pick its submission up before
+# writing it itself, and how long a used idempotency key is remembered.
+WAIT_SECONDS = 10
+IDEMPOTENCY_TIMEOUT = 600
+
+
+class Busy(Exception):
+    pass
+
+
+def queue_size():
+    return getattr(settings, 'ITREPORTING_INGEST_QUEUE_SIZE', 1000)
+
+
+def batch_size():
+    return getattr(settings, 'ITREPORTING_INGEST_BATCH_SIZE', 200)
+
+
+def coalesce_window():
+    return timedelta(seconds=getattr(settings, 'ITREPORTING_COALESCE_WINDOW', 900))
+
+
+def coalesce_similarity():
+    return getattr(settings, 'ITREPORTING_COALESCE_SIMILARITY', 0.5)
+
+
+def words(text):
+    return frozenset(re.findall(r'\w+', text.lower()))
+
+
+def similar(a, b):
+    """Jaccard similarity of two word sets, against ITREPORTING_COALESCE_SIMILARITY."""
+    union = a | b
+    return not union or len(a & b) / len(union) >= coalesce_similarity()
+
+
+class Submission:
+    def __init__(self, issue, key=None):
+        self.issue = issue
+        self.key = key
+        self.parent = None
+        self.error = None
+        # Set under Ingestor.lock: taken by the flusher, or taken back by the
+        # waiting request.
+        self.taken = False
+        self.withdrawn = False
+        self.done = threading.Event()
+
+
+def idempotency_cache_key(author_id, key):
+    return f'itreporting:submission:{author_id}:{key}'
+
+
+def report_note(issue):
+    """How a coalesced report is recorded in its parent's description."""
+    submitted = timezone.localtime(issue.date_submitted).strftime('%Y-%m-%d %H:%M')
+    return f'Also reported by {issue.author.get_username()} on {submitted}: {issue.details}'
+
+
+def add_note(description, note):
+    return f'{description}\n\n{note}' if description else note
+
+
+def coalesce(submissions, recent):
+    """
+    Point each submission's .parent at the issue it is reported under: one of
+    ``recent`` (saved issues), another submission's issue, or its own. A
+    report added to another issue is noted in that issue's description.
+    Returns (new issues, {saved issue pk: [issues reported under it]}, saved
+    issue pks to mark urgent).
+    """
+    candidates = defaultdict(list)
+    for issue in recent:
+        candidates[issue.room, issue.type].append((words(issue.details), issue))
+    created, added, urgent = [], defaultdict(list), set()
+    for submission in submissions:
+        issue = submission.issue
+        issue_words = words(issue.details)
+        group = candidates[issue.room, issue.type]
+        parent = next((candidate for candidate_words, candidate in group if similar(issue_words, candidate_words)), None)
+        if parent is None:
+            issue.reporter_count = 1
+            issue.summary = make_summary(issue.details)
+            group.append((issue_words, issue))
+            created.append(issue)
+            parent = issue
+        elif parent.pk is None:
+            parent.reporter_count += 1
+            parent.urgent = parent.urgent or issue.urgent
+            parent.description = add_note(parent.description, report_note(issue))
+        else:
+            added[parent.pk].append(issue)
+            if issue.urgent and not parent.urgent:
+                urgent.add(parent.pk)
+        submission.parent = parent
+    return created, added, urgent
+
+
+def recover_ids(created):
+    """
+    Set the pks of ``created`` after a bulk insert that did not return them
+    (MySQL). Rows are matched on author, time, room and type; the rows of one
+    insert get increasing ids in order, so identical ones take the newest ids.
+    """
+    inserted = defaultdict(list)
+    for issue in created:
+        inserted[issue.author_id, issue.date_submitted, issue.room, issue.type].append(issue)
+    rows = (Issue.objects.filter(author_id__in={issue.author_id for issue in created},
+                                 date_submitted__in={issue.date_submitted for issue in created})
+            .order_by('id').values_list('author_id', 'date_submitted', 'room', 'type', 'id'))
+    ids = defaultdict(list)
+    for *key, pk in rows:
+        ids[tuple(key)].append(pk)
+    for key, issues in inserted.items():
+        found = ids[key][-len(issues):]
+        if len(found) < len(issues):
+            raise RuntimeError(f'Could not find the ids of {len(issues)} inserted issues.')
+        for issue, pk in zip(issues, found):
+            issue.pk = pk
+
+
+def write(submissions):
+    """Write one batch of submissions in a single transaction."""
+    keys = {(submission.issue.room, submission.issue.type) for submission in submissions}
+    with transaction.atomic():
+        recent = [
+            issue for issue in Issue.objects.select_for_update()
+            .filter(room__in={room for room, type in keys}, type__in={type for room, type in keys},
+                    date_submitted__gte=timezone.now() - coalesce_window())
+            .only('id', 'room', 'type', 'urgent', 'details', 'description', 'reporter_count')
+            .order_by('date_submitted', 'id')
+            if (issue.room, issue.type) in keys
+        ]
+        created, added, urgent = coalesce(submissions, recent)
+        Issue.objects.bulk_create(created)
+        if created and created[0].pk is None:
+            recover_ids(created)
+        issues_bulk_created.send(sender=Issue, issues=created)
+        if added:
+            # The rows are locked, so their descriptions can be extended here.
+            descriptions = {issue.pk: issue.description for issue in recent}
+            for pk, reports in added.items():
+                for issue in reports:
+                    descriptions[pk] = add_note(descriptions[pk], report_note(issue))
+            counts = [When(pk=pk, then=Value(len(reports))) for pk, reports in added.items()]
+            notes = [When(pk=pk, then=Value(descriptions[pk])) for pk in added]
+            Issue.objects.filter(pk__in=list(added)).update(
+                reporter_count=F('reporter_count') + Case(*counts, default=Value(0), output_field=IntegerField()),
+                description=Case(*notes, default=F('description'), output_field=TextField()),
+            )
+            pks = list(added)
+            transaction.on_commit(lambda: invalidate_issue_rows(pks))
+            transaction.on_commit(lambda: live.publish_ids(pks))
+        if urgent:
+            bulk.set_urgent(Issue.objects.filter(pk__in=urgent), True)
+
+
+class Ingestor:
+    def __init__(self, maxsize=None):
+        self.queue = queue.Queue(maxsize or queue_size())
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def submit(self, issue, key=None):
+        """Queue ``issue`` and return the pk it was reported under, once it is committed."""
+        cache_key = idempotency_cache_key(issue.author_id, key) if key else None
+        with self.lock:
+            submission = self.pending.get(cache_key) if cache_key else None
+            if submission is None:
+                if cache_key and (issue_id := cache.get(cache_key)) is not None:
+                    return issue_id
+                submission = Submission(issue, cache_key)
+                try:
+                    self.queue.put_nowait(submission)
+                except queue.Full:
+                    raise Busy('Too many issues are being submitted right now.')
+                if cache_key:
+                    self.pending[cache_key] = submission
+                self.start()
+        return self.wait(submission)
+
+    def wait(self, submission):
+        # Hand the request's pooled connection back first: a burst of waiting
+        # requests could otherwise hold every connection the flusher needs.
+        if not connection.in_atomic_block:
+            connection.close()
+        if not submission.done.wait(WAIT_SECONDS):
+            with self.lock:
+                submission.withdrawn = not submission.taken
+            if submission.withdrawn:
+                # The flusher is stuck or gone; write it from this request.
+                self.flush([submission])
+            else:
+                # It is in the batch being written.
+                submission.done.wait()
+        if submission.error is not None:
+            raise submission.error
+        return submission.parent.pk
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name='itreporting-ingest', daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < batch_size():
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self.lock:
+                batch = [submission for submission in batch if not submission.withdrawn]
+                for submission in batch:
+                    submission.taken = True
+            if batch:
+                self.flush(batch)
+
+    def flush(self, batch):
+        try:
+            write(batch)
+        except Exception as exc:
+            logger.exception('Writing %d issue submissions failed', len(batch))
+            for submission in batch:
+                submission.error = exc
+        finally:
+            # A long-lived thread must hand its connection back itself.
+            close_old_connections()
+        with self.lock:
+            for submission in batch:
+                if submission.key:
+                    if submission.error is None:
+                        cache.set(submission.key, submission.parent.pk, IDEMPOTENCY_TIMEOUT)
+                    self.pending.pop(submission.key, None)
+                submission.done.set()
+
+
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+
+def ingestor():
+    global _ingestor
+    with _ingestor_lock:
+        if _ingestor is None:
+            _ingestor = Ingestor()
+        return _ingestor
+
+
+def submit(issue, key=None):
+    return ingestor().submit(issue, key)
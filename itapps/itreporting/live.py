@@ -0,0 +1,275 @@
+"""
+Live feed of issue changes over Server-Sent Events.
+
+The Issue receivers in itreporting.signals publish every committed change to
+the in-process hub: an "issue" event with the row as the report page shows
+it, or a "removed" event when an issue is deleted or archived. The feed
+(routed only under ASGI, see settings.ASYNC_VIEWS; itapps/asgi.py serves it
+through application()) streams the events that match the client's ?type=
+and ?room= filters. An idle client is an asyncio
+queue and a suspended coroutine, with no thread or database connection, so
+one worker can hold thousands; the hub hands each event to an event loop
+once and fans it out there.
+
+Event ids are "<process token>-<sequence>". The hub keeps the last
+BUFFER_SIZE events, so a client reconnecting with Last-Event-ID gets what it
+missed, or a "reset" event when that is no longer possible (the buffer moved
+on, or the worker restarted) and it should reload. The hub only hears about
+changes saved in its own process.
+"""
+import asyncio
+import itertools
+import json
+import threading
+import uuid
+from collections import deque
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from itreporting.models import Issue
+
+BUFFER_SIZE = 1000
+# Events a slow client may fall behind by before it is disconnected; it then
+# reconnects and catches up from the buffer.
+QUEUE_SIZE = 100
+KEEPALIVE_SECONDS = 20
+RETRY_MILLISECONDS = 3000
+
+
+def enabled():
+    return settings.ASYNC_VIEWS
+
+
+def max_clients():
+    return getattr(settings, 'ITREPORTING_LIVE_MAX_CLIENTS', 10000)
+
+
+class Event:
+    __slots__ = ('sequence', 'kind', 'payload', 'data')
+
+    def __init__(self, token, sequence, kind, payload):
+        self.sequence = sequence
+        self.kind = kind
+        self.payload = payload
+        body = json.dumps(payload, cls=DjangoJSONEncoder)
+        self.data = f'id: {token}-{sequence}\nevent: {kind}\ndata: {body}\n\n'.encode()
+
+
+class Subscriber:
+    __slots__ = ('queue', 'type', 'room', 'overflowed')
+
+    def __init__(self, type=None, room=None):
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.type = type
+        self.room = room
+        self.overflowed = False
+
+    def wants(self, event):
+        if event.kind != 'issue':
+            return True
+        return (not self.type or event.payload['type'] == self.type) and (
+            not self.room or event.payload['room'] == self.room)
+
+
+class Hub:
+    def __init__(self):
+        self.token = uuid.uuid4().hex[:8]
+        self.sequence = itertools.count(1)
+        self.buffer = deque(maxlen=BUFFER_SIZE)
+        self.loops = {}
+        self.clients = 0
+        self.lock = threading.Lock()
+
+    def publish(self, kind, payload):
+        """Send an event to every subscriber; callable from any thread."""
+        with self.lock:
+            event = Event(self.token, next(self.sequence), kind, payload)
+            self.buffer.append(event)
+            loops = list(self.loops)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._deliver, loop, event)
+            except RuntimeError:
+                # The loop has been closed.
+                pass
+
+    def _deliver(self, loop, event):
+        for subscriber in list(self.loops.get(loop, ())):
+            if subscriber.wants(event) and not subscriber.overflowed:
+                try:
+                    subscriber.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    subscriber.overflowed = True
+
+    def subscribe(self, subscriber):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            self.loops.setdefault(loop, set()).add(subscriber)
+            self.clients += 1
+
+    def unsubscribe(self, subscriber):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            subscribers = self.loops.get(loop, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self.loops.pop(loop, None)
+            self.clients -= 1
+
+    def full(self):
+        return self.clients >= max_clients()
+
+    def since(self, last_event_id):
+        """The buffered events after ``last_event_id``, or None if some are lost."""
+        if not last_event_id:
+            return []
+        token, _, sequence = last_event_id.partition('-')
+        if token != self.token or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        with self.lock:
+            events = list(self.buffer)
+        if events and events[0].sequence > sequence + 1:
+            return None
+        return [event for event in events if event.sequence > sequence]
+
+    async def stream(self, subscriber, last_event_id):
+        try:
+            # Subscribe before reading the buffer; anything in both is skipped below.
+            self.subscribe(subscriber)
+            yield f'retry: {RETRY_MILLISECONDS}\n\n'.encode()
+            backlog = self.since(last_event_id)
+            if backlog is None:
+                yield b'event: reset\ndata: {}\n\n'
+                backlog = []
+            sent = 0
+            for event in backlog:
+                if subscriber.wants(event):
+                    yield event.data
+                sent = event.sequence
+            while not subscriber.overflowed:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b': keepalive\n\n'
+                    continue
+                if event.sequence > sent:
+                    yield event.data
+                    sent = event.sequence
+        finally:
+            self.unsubscribe(subscriber)
+
+
+hub = Hub()
+
+
+def issue_payload(issue, username):
+    return {
+        'id': issue.pk,
+        'title': str(issue),
+        'type': issue.type,
+        'room': issue.room,
+        'urgent': issue.urgent,
+        'summary': issue.summary,
+        'date_submitted': issue.date_submitted,
+        'author': username,
+        'reporter_count': issue.reporter_count,
+        'url': issue.get_absolute_url(),
+    }
+
+
+def publish_issues(issues):
+    """Publish saved issues; their authors' usernames are read with one query."""
+    if not enabled() or not issues:
+        return
+    missing = {issue.author_id for issue in issues if not Issue.author.is_cached(issue)}
+    usernames = dict(User.objects.filter(pk__in=missing).values_list('pk', 'username')) if missing else {}
+    for issue in issues:
+        username = issue.author.username if Issue.author.is_cached(issue) else usernames.get(issue.author_id)
+        hub.publish('issue', issue_payload(issue, username))
+
+
+def publish_ids(pks):
+    if enabled() and pks:
+        publish_issues(list(Issue.objects.filter(pk__in=pks).select_related('author').defer('details', 'description')))
+
+
+def publish_removed(pks):
+    if enabled():
+        for pk in pks:
+            hub.publish('removed', {'id': pk})
+
+
+def feed_context(filter_form, page):
+    """Context for the live updates script on report.html."""
+    data = filter_form.cleaned_data
+    query = {name: data[name] for name in ('type', 'room') if data.get(name)}
+    url = reverse('itreporting:issue-feed')
+    return {
+        'live_feed_url': f'{url}?{urlencode(query)}' if query else url,
+        # New issues are only added to the first page, and only when the
+        # script can tell they belong in the list.
+        'live_feed_prepend': not page.has_previous() and not any(
+            data.get(name) for name in ('author', 'date_from', 'date_to')),
+        'live_feed_urgent': '' if data.get('urgent') is None else int(data['urgent']),
+    }
+
+
+async def issue_feed(request):
+    if hub.full():
+        return HttpResponse('Too many live connections.', status=503, headers={'Retry-After': '30'})
+    subscriber = Subscriber(type=request.GET.get('type') or None, room=request.GET.get('room') or None)
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    response = StreamingHttpResponse(hub.stream(subscriber, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def application(scope, receive, send):
+    """
+    issue_feed() as a bare ASGI app. itapps/asgi.py sends the feed's requests
+    here, past the middleware and Django's request handling, which cost a
+    thread hop and tens of kilobytes per open stream.
+    """
+    if hub.full():
+        await send({'type': 'http.response.start', 'status': 503,
+                    'headers': [(b'content-type', b'text/plain'), (b'retry-after', b'30')]})
+        await send({'type': 'http.response.body', 'body': b'Too many live connections.'})
+        return
+    query = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+    headers = dict(scope['headers'])
+    last_event_id = headers.get(b'last-event-id', b'').decode('latin-1') or query.get('last_event_id')
+    subscriber = Subscriber(type=query.get('type') or None, room=query.get('room') or None)
+
+    async def respond():
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no'),
+        ]})
+        stream = hub.stream(subscriber, last_event_id)
+        try:
+            async for chunk in stream:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            await stream.aclose()
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    # The stream only ends when the client goes away (or falls too far behind).
+    tasks = [asyncio.ensure_future(respond()), asyncio.ensure_future(disconnected())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from itreporting import archive
+
+
+class Command(BaseCommand):
+    help = ('Move issues older than --days (default: settings.ITREPORTING_ARCHIVE_AFTER_DAYS) from the '
+            'Issue table to ArchivedIssue, one transaction per batch.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Archive issues submitted more than this many days ago.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between batches, to leave room for other writers.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the issues that would be archived.')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('--days must not be negative.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        before = archive.cutoff(options['days'])
+        if options['dry_run']:
+            count = archive.archivable(before).count()
+            self.stdout.write(f'{count} issues submitted before {before:%Y-%m-%d %H:%M} would be archived.')
+            return
+        total = 0
+        start = time.perf_counter()
+        for archived in archive.archive(before, options['batch_size']):
+            total += archived
+            if options['verbosity'] > 1:
+                self.stderr.write(f'{total} archived...')
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {total} issues submitted before {before:%Y-%m-%d %H:%M} '
+            f'in {time.perf_counter() - start:.1f}s.'
+        ))
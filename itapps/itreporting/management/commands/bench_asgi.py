@@ -0,0 +1,121 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from itreporting.benchmarking import run_async, run_threaded, summarize
+from itreporting.models import Issue
+
+MODES = {
+    # mode: value of ITAPPS_ASYNC_VIEWS for the worker process
+    'wsgi': '0',
+    'asgi': '1',
+}
+
+
+class Command(BaseCommand):
+    help = ('Load the home, report and issue pages concurrently through the WSGI '
+            'handler with the sync views and through the ASGI handler with the async '
+            'views, and compare requests per second and latency percentiles. Each '
+            'mode runs in its own process against the configured database, which '
+            'must already hold some issues.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--db-latency-ms', type=float, default=0.0,
+                            help='Add this much sleep to every SQL query, to mimic a remote database.')
+        parser.add_argument('--cache', action='store_true',
+                            help='Keep the page cache on; by default every request renders.')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+        parser.add_argument('--worker', choices=MODES, help='Run one mode in this process (internal).')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_worker(options['worker'], options)))
+            return
+        if not Issue.objects.exists():
+            raise CommandError('There are no issues to request; import some first (see import_issues).')
+        results = {mode: self.spawn(mode, options) for mode in MODES}
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f'{"mode":<6} {"requests":>8} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+        for mode, result in results.items():
+            self.stdout.write(f'{mode:<6} {result["requests"]:>8} {result["rps"]:>9} '
+                              f'{result["p50_ms"]:>9} {result["p95_ms"]:>9} {result["p99_ms"]:>9}')
+
+    def spawn(self, mode, options):
+        argv = [sys.executable, '-m', 'django', 'bench_asgi', '--worker', mode,
+                '--requests', str(options['requests']), '--concurrency', str(options['concurrency']),
+                '--db-latency-ms', str(options['db_latency_ms'])]
+        if options['cache']:
+            argv.append('--cache')
+        env = dict(os.environ, ITAPPS_ASYNC_VIEWS=MODES[mode])
+        done = subprocess.run(argv, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if done.returncode:
+            raise CommandError(f'The {mode} run failed:\n{done.stderr}')
+        return json.loads(done.stdout)
+
+    def run_worker(self, mode, options):
+        if settings.ASYNC_VIEWS != (mode == 'asgi'):
+            raise CommandError(f'ITAPPS_ASYNC_VIEWS does not match the {mode} mode.')
+        if options['db_latency_ms']:
+            delay = options['db_latency_ms'] / 1000
+
+            def slow_query(execute, sql, params, many, context):
+                time.sleep(delay)
+                return execute(sql, params, many, context)
+
+            def add_latency(sender, connection, **kwargs):
+                # Fires again each time the wrapper reconnects.
+                if slow_query not in connection.execute_wrappers:
+                    connection.execute_wrappers.append(slow_query)
+            connection_created.connect(add_latency, weak=False)
+
+        issue_pk = Issue.objects.order_by('-pk').values_list('pk', flat=True).first()
+        paths = [reverse('itreporting:home'), reverse('itreporting:report'),
+                 reverse('itreporting:issue-detail', args=[issue_pk])]
+        overrides = {'ALLOWED_HOSTS': ['*']}
+        if not options['cache']:
+            dummy = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+            overrides['CACHES'] = {'default': dummy, 'users': dummy}
+        requests, concurrency = options['requests'], options['concurrency']
+
+        with override_settings(**overrides):
+            if mode == 'wsgi':
+                local = threading.local()
+
+                def get(i):
+                    if not hasattr(local, 'client'):
+                        local.client = Client()
+                    self.check_response(local.client.get(paths[i % len(paths)]))
+                    # The test client skips the end-of-request connection
+                    # cleanup that a real server does.
+                    close_old_connections()
+                latencies, elapsed = run_threaded(get, requests, concurrency)
+            else:
+                client = AsyncClient()
+
+                async def aget(i):
+                    self.check_response(await client.get(paths[i % len(paths)]))
+                    await sync_to_async(close_old_connections)()
+                latencies, elapsed = asyncio.run(run_async(aget, requests, concurrency))
+        connections.close_all()
+        return dict(summarize(latencies, elapsed), mode=mode, concurrency=concurrency,
+                    db_latency_ms=options['db_latency_ms'])
+
+    def check_response(self, response):
+        if response.status_code != 200:
+            raise CommandError(f'{response.request["PATH_INFO"]} returned {response.status_code}.')
@@ -0,0 +1,95 @@
+import json
+import random
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, transaction
+
+from itreporting import bulk, ingest
+from itreporting.benchmarking import create_users, run_threaded, summarize
+from itreporting.models import Issue
+
+OUTAGE_TEXTS = (
+    'wifi is down in the lab',
+    'the wifi is down in this lab',
+    'no wifi in the lab, wifi is down',
+    'lab wifi is down again',
+)
+OTHER_TEXTS = ('printer jammed', 'projector will not turn on', 'keyboard missing keys', 'monitor flickers')
+
+
+class Command(BaseCommand):
+    help = ('Simulate a burst of issue submissions (a lab outage reported by many students, some '
+            'double clicking) and compare one transaction per submission with the batched, '
+            'coalescing path in itreporting.ingest. Runs against the configured database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--rooms', type=int, default=3, help='Rooms with an outage.')
+        parser.add_argument('--double-clicks', type=float, default=0.1,
+                            help='Share of submissions that are posted twice with the same key.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+
+    def handle(self, *args, **options):
+        prefix = f'bench-ingest-{uuid.uuid4().hex[:8]}-'
+        user_ids = create_users(options['concurrency'], make_password(None), prefix=prefix, batch_size=1000)
+        try:
+            results = {
+                'direct': self.measure(self.direct, user_ids, options),
+                'queued': self.measure(self.queued, user_ids, options),
+            }
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f'{"mode":<8} {"posts":>6} {"rows":>6} {"per sec":>8} {"p50 ms":>8} {"p95 ms":>8} '
+                          f'{"p99 ms":>8}')
+        for name, result in results.items():
+            self.stdout.write(f'{name:<8} {result["requests"]:>6} {result["rows"]:>6} {result["rps"]:>8} '
+                              f'{result["p50_ms"]:>8} {result["p95_ms"]:>8} {result["p99_ms"]:>8}')
+
+    def burst(self, user_ids, options):
+        """(author id, idempotency key, room, details) per post, double clicks included."""
+        rng = random.Random(options['seed'])
+        rooms = [f'BURST{number}' for number in range(options['rooms'])]
+        posts = []
+        for i in range(options['submissions']):
+            if rng.random() < 0.8:
+                room, details = rng.choice(rooms), rng.choice(OUTAGE_TEXTS)
+            else:
+                room, details = f'BURST-OTHER{i}', rng.choice(OTHER_TEXTS)
+            post = (user_ids[i % len(user_ids)], uuid.uuid4().hex, room, details)
+            posts.append(post)
+            if rng.random() < options['double_clicks']:
+                posts.append(post)
+        return posts
+
+    def issue(self, author_id, room, details):
+        return Issue(type='Hardware', room=room, details=details, description='', author_id=author_id)
+
+    def direct(self, author_id, key, room, details):
+        # What PostCreateView did before: one insert and its receivers per post.
+        with transaction.atomic():
+            self.issue(author_id, room, details).save()
+
+    def queued(self, author_id, key, room, details):
+        ingest.submit(self.issue(author_id, room, details), key)
+
+    def measure(self, submit, user_ids, options):
+        posts = self.burst(user_ids, options)
+
+        def call(i):
+            submit(*posts[i])
+            close_old_connections()
+
+        latencies, elapsed = run_threaded(call, len(posts), options['concurrency'])
+        issues = Issue.objects.filter(author_id__in=user_ids)
+        result = summarize(latencies, elapsed)
+        result['rows'] = issues.count()
+        bulk.delete(issues)
+        return result
@@ -0,0 +1,99 @@
+import re
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from itreporting.benchmarking import ROOMS, bulk_insert, percentile, synthetic_issues, timed
+from itreporting.forms import IssueFilterForm
+from itreporting.models import Issue
+
+# How EXPLAIN says that a query was answered from the index alone.
+INDEX_ONLY = re.compile(r'COVERING INDEX|Using index(?! condition)|Index Only Scan')
+
+
+class Command(BaseCommand):
+    help = ('Insert synthetic issues at growing table sizes and check that each filtered '
+            'report query uses the index meant for it, that locating its page (the ids '
+            'alone) is answered from that index only, and that latency stays flat. '
+            'Everything is rolled back afterwards unless --keep is given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help='Comma-separated table sizes to measure at.')
+        parser.add_argument('--repeat', type=int, default=7)
+        parser.add_argument('--keep', action='store_true', help='Commit the synthetic rows.')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        failures = 0
+        with transaction.atomic():
+            author = User.objects.create(username=f'bench-{uuid.uuid4().hex[:12]}')
+            indexes = self.issue_indexes()
+            inserted = 0
+            self.stdout.write(f'{"rows":>9}  {"query":<28} {"index":<32} {"index-only":<10} '
+                              f'{"p50 ms":>8} {"p95 ms":>8}')
+            for size in sizes:
+                inserted += bulk_insert(Issue, synthetic_issues([author.pk], size - inserted, seed=size))
+                self.analyze()
+                for label, queryset, expected in self.queries(author):
+                    index = self.used_index(queryset.explain(), indexes)
+                    index_only = bool(INDEX_ONLY.search(queryset.values_list('pk', flat=True).explain()))
+                    samples = timed(lambda: list(queryset.all()), options['repeat'])
+                    if index != expected or not index_only:
+                        failures += 1
+                    self.stdout.write(
+                        f'{size:>9}  {label:<28} {index or "FULL SCAN":<32} {"yes" if index_only else "NO":<10} '
+                        f'{percentile(samples, 50) * 1000:>8.2f} {percentile(samples, 95) * 1000:>8.2f}'
+                        + ('' if index == expected else f'  expected {expected}')
+                    )
+            if not options['keep']:
+                transaction.set_rollback(True)
+        if failures:
+            self.stderr.write(self.style.ERROR(
+                f'{failures} filtered queries did not use their index, or not index-only.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All filtered queries used their index, index-only.'))
+
+    def analyze(self):
+        # Refresh planner statistics, as production tables would have them.
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(f'ANALYZE TABLE {Issue._meta.db_table}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    def used_index(self, plan, indexes):
+        return next((name for name in indexes if name in plan), None)
+
+    def issue_indexes(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Issue._meta.db_table)
+        # Longest first so that a name is never matched as a prefix of another.
+        return sorted((name for name, info in constraints.items() if info['index'] and not info['primary_key']),
+                      key=len, reverse=True)
+
+    def queries(self, author):
+        """(label, page queryset, index it should use), filtered as the report view does."""
+        week_ago = timezone.now() - timedelta(days=7)
+        base = Issue.objects.order_by('-date_submitted', '-id')
+        page = 5
+
+        def filtered(**data):
+            return IssueFilterForm(data).filter(base)[:page]
+
+        def date(value):
+            return value.date().isoformat()
+        return [
+            ('urgent hardware this week', filtered(urgent='1', type='Hardware', date_from=date(week_ago)),
+             'issue_urgent_type_date_idx'),
+            ('room this week', filtered(room=ROOMS[0], date_from=date(week_ago)), 'issue_room_date_idx'),
+            ('room, date range', filtered(room=ROOMS[1], date_from=date(week_ago - timedelta(days=30)),
+                                          date_to=date(week_ago)), 'issue_room_date_idx'),
+            ('urgent software', filtered(urgent='1', type='Software'), 'issue_urgent_type_date_idx'),
+            ('author', base.filter(author=author)[:page], 'issue_author_date_idx'),
+            ('latest', base[:page], 'issue_date_id_idx'),
+        ]
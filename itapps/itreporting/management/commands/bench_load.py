@@ -0,0 +1,299 @@
+import html
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from itapps import metrics
+from itreporting.benchmarking import create_users, insert_issues, run_threaded, summarize, synthetic_issues
+from itreporting.models import Issue
+from users.models import Profile
+
+PASSWORD = 'Bench-password-2025'
+# Synthetic issues are dated relative to a fixed day so that every run over
+# the same --seed builds the same data.
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+NEXT_LINK = re.compile(r'href="([^"]*)">Next</a>')
+
+SCENARIOS = ['home', 'report', 'report_page', 'detail', 'create', 'update', 'delete', 'login', 'register']
+
+
+class Command(BaseCommand):
+    help = ('Build a synthetic SQLite database (users, profiles and issues, bulk inserted), '
+            'drive the site through the real URLconf at a given concurrency and report '
+            'requests per second and p50/p95/p99 latency per scenario as JSON. The results '
+            'record the git commit and the dataset, so runs with the same options can be '
+            'compared between commits with --compare.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--issues', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per scenario.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f'Comma-separated subset of: {", ".join(SCENARIOS)}.')
+        parser.add_argument('--db', help='SQLite file to use. It is seeded if empty and reused otherwise, '
+                                         'which saves rebuilding large datasets. Default: a temporary file.')
+        parser.add_argument('--output', help='Write the JSON results to this file instead of stdout.')
+        parser.add_argument('--compare', help='Earlier JSON results to print the changes against.')
+        parser.add_argument('--worker', action='store_true', help='Run the benchmark in this process (internal).')
+
+    def handle(self, *args, **options):
+        scenarios = options['scenarios'].split(',')
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(sorted(unknown))}.')
+        if options['users'] < options['concurrency']:
+            raise CommandError('--users must be at least --concurrency; each thread logs in as its own user.')
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_worker(scenarios, options)))
+            return
+
+        with tempfile.TemporaryDirectory(prefix='itapps-bench-') as workdir:
+            results = self.spawn(workdir, options)
+        results['meta'] = dict(results['meta'], **self.revision())
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        elif not options['compare']:
+            self.stdout.write(output)
+        if options['compare']:
+            with open(options['compare']) as f:
+                self.compare(json.load(f), results)
+
+    def spawn(self, workdir, options):
+        # The worker gets its own settings environment: the local profile
+        # (pooled SQLite backend, local storage) and a private cache, whatever
+        # this process uses.
+        env = dict(
+            os.environ,
+            ITAPPS_PROFILE='local',
+            ITAPPS_SQLITE_PATH=os.path.abspath(options['db']) if options['db'] else os.path.join(workdir, 'bench.sqlite3'),
+            ITAPPS_DB_POOL_SIZE=str(options['concurrency']),
+            ITAPPS_MEDIA_ROOT=os.path.join(workdir, 'media'),
+            ITAPPS_STATIC_ROOT=os.path.join(workdir, 'static'),
+            ITAPPS_ASYNC_VIEWS='0',
+        )
+        env.pop('ITAPPS_CACHE_DIR', None)
+        argv = [sys.executable, '-m', 'django', 'bench_load', '--worker']
+        for name in ('users', 'issues', 'seed', 'requests', 'warmup', 'concurrency', 'scenarios'):
+            argv += [f'--{name}', str(options[name])]
+        done = subprocess.run(argv, env=env, cwd=settings.BASE_DIR, stdout=subprocess.PIPE, text=True)
+        if done.returncode:
+            raise CommandError('The benchmark run failed; see the output above.')
+        return json.loads(done.stdout)
+
+    def revision(self):
+        def git(*args):
+            done = subprocess.run(['git', *args], cwd=settings.BASE_DIR, capture_output=True, text=True)
+            return done.stdout.strip() if done.returncode == 0 else None
+        status = git('status', '--porcelain', '--untracked-files=no')
+        return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(status) if status is not None else None}
+
+    def run_worker(self, scenarios, options):
+        if settings.DATABASES['default']['ENGINE'] != 'itapps.backends.sqlite3':
+            raise CommandError('The worker must run against the SQLite backend (ITAPPS_PROFILE=local).')
+        call_command('migrate', interactive=False, verbosity=0)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.copy_default_image()
+        started = time.perf_counter()
+        seeded = not Issue.objects.exists()
+        if seeded:
+            self.seed(options)
+        dataset = {
+            'users': User.objects.count(),
+            'issues': Issue.objects.count(),
+            'seeded': seeded,
+            'seed_seconds': round(time.perf_counter() - started, 2),
+        }
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        connections.close_all()
+
+        self.users = list(User.objects.filter(username__startswith='user').order_by('pk')[:options['concurrency']])
+        self.local = threading.local()
+        self.thread_ids = itertools.count()
+        self.rng = random.Random(options['seed'])
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for name in scenarios:
+                self.stderr.write(f'Running {name}...')
+                results[name] = self.run_scenario(name, options)
+        connections.close_all()
+        return {
+            'meta': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'debug': settings.DEBUG,
+                'started_at': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+            },
+            'options': {name: options[name] for name in ('users', 'issues', 'seed', 'requests', 'warmup', 'concurrency')},
+            'dataset': dataset,
+            'scenarios': results,
+        }
+
+    def copy_default_image(self):
+        # Registered users get the default picture, and thumbnails are made from it.
+        name = Profile._meta.get_field('image').default
+        if not default_storage.exists(name):
+            with open(settings.BASE_DIR / 'media' / name, 'rb') as f:
+                default_storage.save(name, File(f))
+
+    def seed(self, options):
+        self.stderr.write(f'Creating {options["users"]} users and {options["issues"]} issues...')
+        user_ids = create_users(options['users'], make_password(PASSWORD))
+        insert_issues(synthetic_issues(user_ids, options['issues'], seed=options['seed'], now=EPOCH))
+
+    def run_scenario(self, name, options):
+        total = options['warmup'] + options['requests']
+        setup = getattr(self, f'setup_{name}', None)
+        if setup:
+            setup(total, options['concurrency'])
+            close_old_connections()
+        request = getattr(self, f'request_{name}')
+        errors = []
+
+        def call(i):
+            response, expected = request(i)
+            # The test client skips the end-of-request connection cleanup
+            # that a real server does.
+            close_old_connections()
+            if response.status_code != expected:
+                errors.append(f'{response.request["PATH_INFO"]} returned {response.status_code}')
+
+        run_threaded(call, options['warmup'], options['concurrency'])
+        queries = self.query_totals()
+        latencies, elapsed = run_threaded(call, options['requests'], options['concurrency'])
+        after = self.query_totals()
+        result = summarize(latencies, elapsed)
+        result['queries_per_request'] = round((after[0] - queries[0]) / max(after[1] - queries[1], 1), 2)
+        result['errors'] = len(errors)
+        if errors:
+            self.stderr.write(self.style.WARNING(f'{name}: {len(errors)} errors, e.g. {errors[0]}'))
+        return result
+
+    def query_totals(self):
+        # (SQL statements, requests) so far, from the metrics middleware.
+        total = count = 0
+        for histogram in list(metrics.SQL_QUERIES._children.values()):
+            counts, histogram_sum, histogram_count = histogram.snapshot()
+            total += histogram_sum
+            count += histogram_count
+        return total, count
+
+    def client(self):
+        local = self.local
+        if not hasattr(local, 'client'):
+            local.user = self.users[next(self.thread_ids) % len(self.users)]
+            local.client = Client()
+            local.client.force_login(local.user)
+            close_old_connections()
+        return local.client
+
+    def random_issue(self):
+        return self.rng.choice(self.issue_ids)
+
+    def setup_detail(self, total, concurrency):
+        self.issue_ids = list(Issue.objects.values_list('pk', flat=True)[:10000])
+
+    def setup_report_page(self, total, concurrency):
+        response = Client().get(reverse('itreporting:report'))
+        match = NEXT_LINK.search(response.content.decode())
+        if not match:
+            raise CommandError('The report page has no Next link; seed more issues.')
+        self.next_page = reverse('itreporting:report') + html.unescape(match.group(1))
+
+    def setup_update(self, total, concurrency):
+        self.setup_delete(total, concurrency)
+
+    def setup_delete(self, total, concurrency):
+        # Every thread acts as one of the first users and needs issues of its
+        # own; give each user enough for all requests, however they spread.
+        issues = (Issue(type='Hardware', room='A1', details=f'Bench issue {i}', summary=f'Bench issue {i}',
+                        description='', author=user, date_submitted=EPOCH)
+                  for user in self.users for i in range(total))
+        insert_issues(issues)
+        self.own_issues = {user.pk: list(Issue.objects.filter(author=user, details__startswith='Bench issue')
+                                         .order_by('pk').values_list('pk', flat=True))
+                           for user in self.users}
+        self.own_lock = threading.Lock()
+
+    def own_issue(self, pop=False):
+        client = self.client()
+        with self.own_lock:
+            issues = self.own_issues[self.local.user.pk]
+            return client, issues.pop() if pop else issues[0]
+
+    def request_home(self, i):
+        return Client().get(reverse('itreporting:home')), 200
+
+    def request_report(self, i):
+        return Client().get(reverse('itreporting:report')), 200
+
+    def request_report_page(self, i):
+        return Client().get(self.next_page), 200
+
+    def request_detail(self, i):
+        return Client().get(reverse('itreporting:issue-detail', args=[self.random_issue()])), 200
+
+    def request_create(self, i):
+        data = {'type': 'Software', 'room': 'B2', 'urgent': 'on', 'details': f'Created by the benchmark ({i})'}
+        return self.client().post(reverse('itreporting:issue-create'), data), 302
+
+    def request_update(self, i):
+        client, pk = self.own_issue()
+        data = {'type': 'Software', 'room': 'C3', 'details': f'Updated by the benchmark ({i})'}
+        return client.post(reverse('itreporting:issue-update', args=[pk]), data), 302
+
+    def request_delete(self, i):
+        client, pk = self.own_issue(pop=True)
+        return client.post(reverse('itreporting:issue-delete', args=[pk])), 302
+
+    def request_login(self, i):
+        user = self.users[i % len(self.users)]
+        return Client().post(reverse('login'), {'username': user.username, 'password': PASSWORD}), 302
+
+    def request_register(self, i):
+        username = f'reg{time.time_ns()}{i}'
+        data = {'username': username, 'email': f'{username}@example.com', 'password1': PASSWORD, 'password2': PASSWORD}
+        return Client().post(reverse('register'), data), 302
+
+    def compare(self, before, after):
+        self.stdout.write(f'{(before["meta"].get("commit") or "?")[:10]} -> {(after["meta"].get("commit") or "?")[:10]}')
+        if before['options'] != after['options']:
+            self.stdout.write(self.style.WARNING('The runs used different options; the numbers may not be comparable.'))
+        self.stdout.write(f'{"scenario":<12} {"req/s":>17} {"p50 ms":>19} {"p95 ms":>19} {"p99 ms":>19}')
+        for name, result in after['scenarios'].items():
+            old = before['scenarios'].get(name)
+            if old is None:
+                continue
+            cells = []
+            for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+                change = (result[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                cells.append(f'{result[key]:>9} ({change:+6.1f}%)')
+            self.stdout.write(f'{name:<12} ' + ' '.join(cells))
@@ -0,0 +1,83 @@
+import copy
+import json
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from itreporting import prerender
+from itreporting.benchmarking import percentile
+
+UNCACHED_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+CACHED_LOADERS = [('django.template.loaders.cached.Loader', UNCACHED_LOADERS)]
+
+
+def templates_with(loaders):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['APP_DIRS'] = False
+    templates[0]['OPTIONS']['loaders'] = loaders
+    return templates
+
+
+class Command(BaseCommand):
+    help = ('Time anonymous requests for the public pages: rendered with and without the cached '
+            'template loader (page cache emptied before each request), from the page cache, and '
+            'from the pre-rendered files. Runs against the configured database and cache.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per page and mode.')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        with tempfile.TemporaryDirectory() as root:
+            modes = {
+                'render, uncached loaders': dict(settings=dict(TEMPLATES=templates_with(UNCACHED_LOADERS)), clear=True),
+                'render, cached loader': dict(settings=dict(TEMPLATES=templates_with(CACHED_LOADERS)), clear=True),
+                'page cache': dict(settings={}, clear=False),
+                'pre-rendered': dict(settings=dict(ITREPORTING_PRERENDER_ROOT=root), clear=False),
+            }
+            with override_settings(ITREPORTING_PRERENDER_ROOT=root):
+                prerender.build()
+            results = {name: self.measure(mode, requests) for name, mode in modes.items()}
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f'{"page":<12} {"mode":<26} {"p50 ms":>8} {"p95 ms":>8} {"bytes":>7}')
+        for name, pages in results.items():
+            for page, result in pages.items():
+                self.stdout.write(f'{page:<12} {name:<26} {result["p50_ms"]:>8} {result["p95_ms"]:>8} '
+                                  f'{result["bytes"]:>7}')
+
+    def measure(self, mode, requests):
+        results = {}
+        # Without a prerender root that exists, serve_prerendered() falls through.
+        overrides = {'ITREPORTING_PRERENDER_ROOT': '/nonexistent', **mode['settings'], 'ALLOWED_HOSTS': ['*']}
+        with override_settings(**overrides):
+            client = Client(HTTP_ACCEPT_ENCODING='gzip')
+            for page in prerender.PAGES:
+                url = reverse(f'itreporting:{page}')
+                client.get(url)
+                close_old_connections()
+                latencies = []
+                for _ in range(requests):
+                    if mode['clear']:
+                        cache.clear()
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    latencies.append(time.perf_counter() - start)
+                    close_old_connections()
+                results[page] = {
+                    'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+                    'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+                    'bytes': len(response.content),
+                }
+        return results
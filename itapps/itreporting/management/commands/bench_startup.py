@@ -0,0 +1,91 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILES = ('local', 'production')
+
+# Run in a fresh interpreter for every sample, so that nothing is imported yet.
+WORKER = '''
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter() - started
+modules = len(sys.modules)
+from django.conf import settings
+from django.test import Client
+client = Client(raise_request_exception=False)
+host = next((host for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+started = time.perf_counter()
+response = client.get(sys.argv[1], HTTP_HOST=host)
+first_request = time.perf_counter() - started
+print(json.dumps({
+    'setup_ms': setup * 1000,
+    'first_request_ms': first_request * 1000,
+    'status': response.status_code,
+    'modules_after_setup': modules,
+    'modules': len(sys.modules),
+    'azure': 'azure.core' in sys.modules,
+    'crispy': 'crispy_forms.templatetags.crispy_forms_filters' in sys.modules,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Start the site in a new process for each settings profile and measure how long '
+            'django.setup() takes and how long the first request then takes. Each profile runs '
+            'in its own environment (ITAPPS_PROFILE), so the production profile needs its Azure '
+            'settings; a profile that cannot start is reported with its error.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=list(PROFILES))
+        parser.add_argument('--runs', type=int, default=5, help='Cold starts per profile.')
+        parser.add_argument('--path', default='/itreporting/aboutus', help='The first request.')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1.')
+        results = {profile: self.measure(profile, options) for profile in options['profiles']}
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f'{"profile":<11} {"setup ms":>9} {"first ms":>9} {"total ms":>9} {"modules":>8} '
+                          f'{"status":>6} {"azure":>6} {"crispy":>6}')
+        for profile, result in results.items():
+            if 'error' in result:
+                self.stdout.write(f'{profile:<11} failed: {result["error"]}')
+                continue
+            self.stdout.write(f'{profile:<11} {result["setup_ms"]:>9} {result["first_request_ms"]:>9} '
+                              f'{result["total_ms"]:>9} {result["modules"]:>8} {result["status"]:>6} '
+                              f'{"yes" if result["azure"] else "no":>6} {"yes" if result["crispy"] else "no":>6}')
+
+    def measure(self, profile, options):
+        env = dict(os.environ, ITAPPS_PROFILE=profile, DJANGO_SETTINGS_MODULE='itapps.settings')
+        samples = []
+        for _ in range(options['runs']):
+            done = subprocess.run([sys.executable, '-c', WORKER, options['path']], env=env,
+                                  cwd=settings.BASE_DIR, capture_output=True, text=True)
+            if done.returncode:
+                lines = done.stderr.strip().splitlines()
+                return {'error': lines[-1] if lines else f'exit status {done.returncode}'}
+            samples.append(json.loads(done.stdout.strip().splitlines()[-1]))
+        last = samples[-1]
+        return {
+            'runs': len(samples),
+            # Medians over the cold starts.
+            'setup_ms': round(statistics.median(sample['setup_ms'] for sample in samples), 1),
+            'first_request_ms': round(statistics.median(sample['first_request_ms'] for sample in samples), 1),
+            'total_ms': round(statistics.median(sample['setup_ms'] + sample['first_request_ms']
+                                                for sample in samples), 1),
+            'modules': last['modules'],
+            'modules_after_setup': last['modules_after_setup'],
+            'status': last['status'],
+            'azure': last['azure'],
+            'crispy': last['crispy'],
+        }
@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from itreporting.export import FORMATS, export_stream
+from itreporting.forms import IssueFilterForm
+from itreporting.models import Issue
+
+
+class Command(BaseCommand):
+    help = 'Stream issues to a CSV or JSONL file (or stdout), optionally gzip-compressed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-', help="Output path, or '-' for stdout.")
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--type')
+        parser.add_argument('--urgent', choices=['0', '1'])
+        parser.add_argument('--room')
+        parser.add_argument('--author', help='Username of the reporter.')
+        parser.add_argument('--date-from', help='YYYY-MM-DD')
+        parser.add_argument('--date-to', help='YYYY-MM-DD, inclusive')
+
+    def handle(self, *args, **options):
+        form = IssueFilterForm({name: options[name] for name in IssueFilterForm.base_fields if options[name]})
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        chunks = export_stream(form.filter(Issue.objects.all()), options['format'], options['gzip'])
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if output is sys.stdout.buffer:
+                output.flush()
+            else:
+                output.close()
@@ -0,0 +1,185 @@
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from itreporting.models import Issue, make_summary
+from itreporting.signals import issues_bulk_created
+
+TYPES = {value for value, label in Issue._meta.get_field('type').choices}
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+FALSE_VALUES = {'', '0', 'false', 'no', 'n', 'off'}
+
+
+class InvalidRow(ValueError):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Stream issues from a CSV or JSONL file (or stdin) into the database in batched '
+            'bulk inserts. Columns: type, room, urgent, details, description, author '
+            '(username) and optionally date_submitted (ISO 8601).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Path to a .csv or .jsonl file, or '-' for stdin.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Input format; guessed from the file extension when omitted.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--checkpoint',
+                            help='File recording how many records have been committed '
+                                 '(default: <source>.checkpoint).')
+        parser.add_argument('--resume', action='store_true',
+                            help='Skip the records already committed according to the checkpoint.')
+        parser.add_argument('--strict', action='store_true',
+                            help='Stop at the first invalid record instead of skipping it.')
+
+    def handle(self, *args, **options):
+        source = options['source']
+        fmt = options['format'] or ('jsonl' if source.endswith(('.jsonl', '.ndjson')) else 'csv')
+        checkpoint = options['checkpoint'] or (None if source == '-' else source + '.checkpoint')
+        if options['resume'] and not checkpoint:
+            raise CommandError('--resume needs --checkpoint when reading from stdin.')
+
+        skip = self.read_checkpoint(checkpoint) if options['resume'] else 0
+        self.authors = {}
+        self.started = time.monotonic()
+        self.imported = self.invalid = 0
+        committed = skip
+
+        stream = sys.stdin if source == '-' else open(source, newline='', encoding='utf-8')
+        try:
+            records = self.read_csv(stream) if fmt == 'csv' else self.read_jsonl(stream)
+            records = itertools.islice(enumerate(records, start=1), skip, None)
+            while chunk := list(itertools.islice(records, options['batch_size'])):
+                batch = self.build_batch(chunk, options['strict'])
+                try:
+                    with transaction.atomic():
+                        Issue.objects.bulk_create(batch)
+                        issues_bulk_created.send(sender=Issue, issues=batch)
+                except DatabaseError as exc:
+                    raise CommandError(
+                        f'Batch ending at record {chunk[-1][0]} failed: {exc}. {committed} records '
+                        f'are committed; fix the input and re-run with --resume.'
+                    )
+                committed = chunk[-1][0]
+                self.imported += len(batch)
+                self.write_checkpoint(checkpoint, committed)
+                self.progress(committed)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.imported} issues ({self.invalid} invalid records skipped) '
+            f'in {elapsed:.1f}s, {self.imported / max(elapsed, 1e-9):.0f} rows/s.'
+        ))
+
+    def read_csv(self, stream):
+        yield from csv.DictReader(stream)
+
+    def read_jsonl(self, stream):
+        for line in stream:
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield InvalidRow(f'invalid JSON: {exc}')
+                    continue
+                yield row if isinstance(row, dict) else InvalidRow('each line must be a JSON object')
+
+    def build_batch(self, chunk, strict):
+        self.resolve_authors(row for number, row in chunk if isinstance(row, dict))
+        batch = []
+        for number, row in chunk:
+            try:
+                if isinstance(row, InvalidRow):
+                    raise row
+                batch.append(self.build_issue(row))
+            except InvalidRow as exc:
+                if strict:
+                    raise CommandError(f'Record {number}: {exc}')
+                self.invalid += 1
+                self.stderr.write(f'Skipping record {number}: {exc}')
+        return batch
+
+    def resolve_authors(self, rows):
+        # Usernames seen before are answered from self.authors; the rest of
+        # the batch is looked up in one query.
+        missing = {str(row.get('author') or '').strip() for row in rows} - self.authors.keys() - {''}
+        if missing:
+            found = dict(User.objects.filter(username__in=missing).values_list('username', 'id'))
+            self.authors.update({username: found.get(username) for username in missing})
+
+    def build_issue(self, row):
+        issue_type = str(row.get('type') or '').strip()
+        if issue_type not in TYPES:
+            raise InvalidRow(f'type must be one of {sorted(TYPES)}, got {issue_type!r}')
+        room = str(row.get('room') or '').strip()
+        if not room or len(room) > Issue._meta.get_field('room').max_length:
+            raise InvalidRow(f'room must be 1-100 characters, got {room!r}')
+        details = str(row.get('details') or '').strip()
+        if not details:
+            raise InvalidRow('details is required')
+        author_id = self.authors.get(str(row.get('author') or '').strip())
+        if author_id is None:
+            raise InvalidRow(f'unknown author {row.get("author")!r}')
+        return Issue(
+            type=issue_type,
+            room=room,
+            urgent=self.parse_bool(row.get('urgent')),
+            details=details,
+            summary=make_summary(details),
+            description=str(row.get('description') or ''),
+            author_id=author_id,
+            date_submitted=self.parse_date(row.get('date_submitted')),
+        )
+
+    def parse_bool(self, value):
+        if isinstance(value, bool):
+            return value
+        value = str(value if value is not None else '').strip().lower()
+        if value in TRUE_VALUES:
+            return True
+        if value in FALSE_VALUES:
+            return False
+        raise InvalidRow(f'urgent must be a boolean, got {value!r}')
+
+    def parse_date(self, value):
+        if not value:
+            return timezone.now()
+        try:
+            parsed = parse_datetime(str(value))
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise InvalidRow(f'date_submitted is not an ISO 8601 datetime: {value!r}')
+        return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+    def read_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            return json.load(f)['records']
+
+    def write_checkpoint(self, path, records):
+        if not path:
+            return
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'records': records}, f)
+        os.replace(path + '.tmp', path)
+
+    def progress(self, committed):
+        elapsed = time.monotonic() - self.started
+        self.stderr.write(
+            f'{committed} records read, {self.imported} imported, {self.invalid} invalid, '
+            f'{self.imported / max(elapsed, 1e-9):.0f} rows/s'
+        )
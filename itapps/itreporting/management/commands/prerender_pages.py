@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from itreporting import prerender
+
+
+class Command(BaseCommand):
+    help = ('Render the public pages (home, about, contact) for anonymous visitors into '
+            'settings.ITREPORTING_PRERENDER_ROOT, plain and gzipped. The deploy workflow runs it '
+            'after collectstatic; pages built from other templates or static files are not served.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Directory to write to instead of ITREPORTING_PRERENDER_ROOT.')
+
+    def handle(self, *args, **options):
+        sizes = prerender.build(options['output'])
+        for name, (size, compressed) in sizes.items():
+            self.stdout.write(f'{name}: {size} bytes, {compressed} gzipped')
+        self.stdout.write(self.style.SUCCESS(f'Pre-rendered {len(sizes)} pages.'))
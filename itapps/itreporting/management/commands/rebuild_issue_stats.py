@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from itreporting import stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the IssueStat rollup table from scratch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = stats.rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} issue statistics rows.'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from itreporting import counters
+
+
+class Command(BaseCommand):
+    help = ("Recompute each profile's open, urgent and total issue counts from the Issue and "
+            "ArchivedIssue tables and repair the ones that have drifted.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the profiles that are wrong.')
+
+    def handle(self, *args, **options):
+        drifted = counters.reconcile(dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f'{len(drifted)} profiles have wrong counts.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Repaired the counts of {len(drifted)} profiles.'))
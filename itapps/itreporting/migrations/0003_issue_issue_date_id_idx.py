@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itreporting', '0002_rename_date_submited_issue_date_submitted'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['-date_submitted', '-id'], name='issue_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itreporting', '0003_issue_issue_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['urgent', 'type', '-date_submitted', '-id'], name='issue_urgent_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['room', '-date_submitted', '-id'], name='issue_room_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['author', '-date_submitted', '-id'], name='issue_author_date_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:03
+
+from django.db import migrations
+
+from itreporting import search
+
+
+def forwards(apps, schema_editor):
+    search.install(schema_editor)
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"INSERT INTO {search.FTS_TABLE}({search.FTS_TABLE}) VALUES ('rebuild')")
+
+
+def backwards(apps, schema_editor):
+    search.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itreporting', '0004_issue_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
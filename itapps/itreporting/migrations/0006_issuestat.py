@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+def build_stats(apps, schema_editor):
+    Issue = apps.get_model('itreporting', 'Issue')
+    IssueStat = apps.get_model('itreporting', 'IssueStat')
+    from django.db.models import Count
+    from django.db.models.functions import TruncDate
+    rows = (
+        Issue.objects.annotate(day=TruncDate('date_submitted'))
+        .values('day', 'room', 'type', 'urgent')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    IssueStat.objects.bulk_create((IssueStat(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itreporting', '0005_issue_fulltext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('room', models.CharField(max_length=100)),
+                ('type', models.CharField(max_length=100)),
+                ('urgent', models.BooleanField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'room', 'type', 'urgent'), name='issue_stat_key')],
+            },
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+
+def fill_summaries(apps, schema_editor):
+    from itreporting.models import make_summary
+    Issue = apps.get_model('itreporting', 'Issue')
+    last_pk = 0
+    while True:
+        batch = list(Issue.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'details')[:1000])
+        if not batch:
+            break
+        for issue in batch:
+            issue.summary = make_summary(issue.details)
+        Issue.objects.bulk_update(batch, ['summary'])
+        last_pk = batch[-1].pk
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itreporting', '0006_issuestat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='summary',
+            field=models.CharField(blank=True, editable=False, max_length=150),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
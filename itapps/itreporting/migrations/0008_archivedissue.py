@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itreporting', '0007_issue_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedIssue',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('type', models.CharField(choices=[('Hardware', 'Hardware'), ('Software', 'Software')], max_length=100)),
+                ('room', models.CharField(max_length=100)),
+                ('urgent', models.BooleanField(default=False)),
+                ('details', models.TextField()),
+                ('summary', models.CharField(blank=True, max_length=150)),
+                ('date_submitted', models.DateTimeField()),
+                ('description', models.TextField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_issues', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['author', '-date_submitted', '-id'], name='archived_author_date_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itreporting', '0008_archivedissue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedissue',
+            name='reporter_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='reporter_count',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
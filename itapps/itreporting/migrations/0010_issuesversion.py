@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itreporting', '0009_issue_reporter_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssuesVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+def create_row(apps, schema_editor):
+    IssuesVersion = apps.get_model('itreporting', 'IssuesVersion')
+    IssuesVersion.objects.get_or_create(pk=1)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('itreporting', '0010_issuesversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_row, migrations.RunPython.noop),
+    ]
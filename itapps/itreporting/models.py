@@ -2,8 +2,16 @@ from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils.text import Truncator
 # Create your models here.
 
+SUMMARY_LENGTH = 150
+
+
+def make_summary(text, length=SUMMARY_LENGTH):
+    """``text`` on one line, cut to ``length`` characters."""
+    return Truncator(' '.join(text.split())).chars(length)
+
 class Issue(models.Model):
     type = models.CharField(max_length=100, choices = [('Hardware','Hardware'),('Software','Software')])
     room = models.CharField(max_length=100)
@@ -21,12 +29,114 @@ class Issue(models.Model):
     room = models.CharField(max_length=100)
     urgent = models.BooleanField(default=False)
     details = models.TextField()
+    # Shown by the list pages, which defer details and description. Set by
+    # save(); code that bulk creates issues must set it with make_summary().
+    summary = models.CharField(max_length=SUMMARY_LENGTH, blank=True, editable=False)
     date_submitted = models.DateTimeField(default=timezone.now)
     description = models.TextField()
     author = models.ForeignKey(User, related_name='issues', on_delete=models.CASCADE)
+    # Similar reports of the same room and type are counted here instead of
+    # becoming separate issues (see itreporting.ingest).
+    reporter_count = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            # Backs the keyset pagination of the report list.
+            models.Index(fields=['-date_submitted', '-id'], name='issue_date_id_idx'),
+            # Filtered report views: "urgent hardware issues this week",
+            # "issues in room X between two dates".
+            models.Index(fields=['urgent', 'type', '-date_submitted', '-id'], name='issue_urgent_type_date_idx'),
+            models.Index(fields=['room', '-date_submitted', '-id'], name='issue_room_date_idx'),
+            models.Index(fields=['author', '-date_submitted', '-id'], name='issue_author_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.type} Issue in {self.room}'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the values as loaded so that save receivers can tell what
+        # changed without querying the row again.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        if 'details' not in self.get_deferred_fields():
+            self.summary = make_summary(self.details)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'details' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'summary'}
+        super().save(*args, **kwargs)
+
+    def get_absolute_url(self):
+        return reverse('itreporting:issue-detail', kwargs={'pk': self.pk})
+
+
+class ArchivedIssue(models.Model):
+    """An issue moved out of the Issue table by itreporting.archive; it keeps its id."""
+    id = models.BigIntegerField(primary_key=True)
+    type = models.CharField(max_length=100, choices=[('Hardware', 'Hardware'), ('Software', 'Software')])
+    room = models.CharField(max_length=100)
+    urgent = models.BooleanField(default=False)
+    details = models.TextField()
+    summary = models.CharField(max_length=SUMMARY_LENGTH, blank=True)
+    date_submitted = models.DateTimeField()
+    description = models.TextField()
+    author = models.ForeignKey(User, related_name='archived_issues', on_delete=models.CASCADE)
+    reporter_count = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', '-date_submitted', '-id'], name='archived_author_date_idx'),
+        ]
 
     def __str__(self):
         return f'{self.type} Issue in {self.room}'
 
     def get_absolute_url(self):
         return reverse('itreporting:issue-detail', kwargs={'pk': self.pk})
+
+
+class IssueStat(models.Model):
+    """Issue counts per day, room, type and urgent flag, kept up to date by itreporting.stats."""
+    day = models.DateField()
+    room = models.CharField(max_length=100)
+    type = models.CharField(max_length=100)
+    urgent = models.BooleanField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'room', 'type', 'urgent'], name='issue_stat_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.day} {self.type} in {self.room}: {self.count}'
+
+
+class IssuesVersion(models.Model):
+    """
+    One row (pk 1), bumped by itreporting.cache.bump_issues_version() after
+    every committed issue change. Unlike the cached issues version it is the
+    same for every worker, so the API's ETag and Last-Modified are built from
+    it.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def current(cls):
+        """(version, changed_at); (0, None) if the row is missing."""
+        return cls.objects.filter(pk=1).values_list('version', 'changed_at').first() or (0, None)
+
+    @classmethod
+    def bump(cls):
+        # The row is created by migration 0011. The version only ever moves
+        # through this UPDATE, so concurrent bumps are never lost.
+        changes = {'version': models.F('version') + 1, 'changed_at': timezone.now()}
+        if not cls.objects.filter(pk=1).update(**changes):
+            # The table was emptied (by flush, say): put the row back at 0.
+            cls.objects.get_or_create(pk=1)
+            cls.objects.filter(pk=1).update(**changes)
@@ -0,0 +1,133 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.http import Http404
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset paginator: pages are located by the ordering values of the row at
+    the page boundary, so no COUNT(*) or OFFSET is ever issued. All ordering
+    fields must sort in the same direction and together identify a row.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-date_submitted', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.descending = self.ordering[0].startswith('-')
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        if any(name.startswith('-') != self.descending for name in self.ordering):
+            raise ValueError('CursorPaginator ordering fields must share one direction.')
+
+    def page(self, cursor=None):
+        queryset, build = self._page_query(cursor)
+        return build(list(queryset))
+
+    async def apage(self, cursor=None):
+        """Async counterpart of page(), for views served under ASGI."""
+        queryset, build = self._page_query(cursor)
+        return build([obj async for obj in queryset.aiterator()])
+
+    def _page_query(self, cursor):
+        reverse_ordering = [name.lstrip('-') if self.descending else '-' + name for name in self.ordering]
+        if not cursor:
+            queryset = self.queryset.order_by(*self.ordering)
+            return queryset[:self.per_page + 1], lambda rows: self._forward(rows, has_previous=False)
+        direction, values = self.decode_cursor(cursor)
+        if direction == 'n':
+            queryset = self._after(values).order_by(*self.ordering)
+            return queryset[:self.per_page + 1], lambda rows: self._forward(rows, has_previous=True)
+        queryset = self._before(values).order_by(*reverse_ordering)
+        return queryset[:self.per_page + 1], self._backward
+
+    def _forward(self, rows, has_previous):
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor('n', rows[-1]) if has_next else None,
+            previous_cursor=self.encode_cursor('p', rows[0]) if has_previous and rows else None,
+        )
+
+    def _backward(self, rows):
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor('n', rows[-1]) if rows else None,
+            previous_cursor=self.encode_cursor('p', rows[0]) if has_previous else None,
+        )
+
+    def _after(self, values):
+        return self.queryset.filter(self._keyset_q(values, 'lt' if self.descending else 'gt'))
+
+    def _before(self, values):
+        return self.queryset.filter(self._keyset_q(values, 'gt' if self.descending else 'lt'))
+
+    def _keyset_q(self, values, lookup):
+        # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y)
+        condition = Q()
+        for i, field in enumerate(self.fields):
+            term = Q(**{f'{field}__{lookup}': values[i]})
+            for prior, value in zip(self.fields[:i], values[:i]):
+                term &= Q(**{prior: value})
+            condition |= term
+        # The OR alone makes the database scan the index from the start; a
+        # plain range on the first field lets it seek to the cursor.
+        return Q(**{f'{self.fields[0]}__{lookup}e': values[0]}) & condition
+
+    def encode_cursor(self, direction, obj):
+        values = []
+        for name in self.fields:
+            value = getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps([direction, values], separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, raw_values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if direction not in ('n', 'p') or len(raw_values) != len(self.fields):
+                raise ValueError
+            opts = self.queryset.model._meta
+            values = [opts.get_field(name).to_python(value) for name, value in zip(self.fields, raw_values)]
+        except Exception:
+            raise Http404('Invalid page cursor.')
+        return direction, values
+
+
+class CursorPaginationMixin:
+    """Swap a ListView's page-number pagination for CursorPaginator."""
+
+    cursor_ordering = ('-date_submitted', '-id')
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(queryset, page_size, self.cursor_ordering)
+        page = paginator.page(self.request.GET.get(self.cursor_query_param))
+        return (paginator, page, page.object_list, page.has_other_pages())
@@ -0,0 +1,170 @@
+"""
+Pre-rendered copies of the public pages.
+
+The prerender_pages command renders the PAGES views for an anonymous visitor
+into ITREPORTING_PRERENDER_ROOT, as <name>.html and a gzipped <name>.html.gz.
+serve_prerendered() answers anonymous requests for those pages from the
+files, with an ETag and a long public Cache-Control lifetime. Logged-in
+users, visitors with a pending flash message, and pages that have not been
+built get the live view.
+
+The "Latest Issues" sidebar changes with every new issue, so the
+pre-rendered pages fetch it from the latest-issues fragment instead (see
+base.html). The deploy workflow builds the pages after collectstatic. Each
+build is stamped with build_version(), a hash of the templates and the
+static files manifest, and a process only serves pages built from the same
+templates and static files as its own; otherwise it renders them live until
+the command is run again.
+"""
+import functools
+import gzip
+import hashlib
+import inspect
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import HttpRequest, HttpResponse
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+from itreporting.cache import _acacheable_request, _cacheable_request
+
+# URL names in the itreporting namespace, and the names of their views.
+PAGES = ('home', 'aboutus', 'contactus')
+VERSION_FILE = 'VERSION'
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+_loaded = {}
+
+
+def prerender_root():
+    return Path(getattr(settings, 'ITREPORTING_PRERENDER_ROOT', settings.BASE_DIR / 'prerendered'))
+
+
+def max_age():
+    return getattr(settings, 'ITREPORTING_PRERENDER_MAX_AGE', 86400)
+
+
+@functools.cache
+def build_version():
+    """Hash of every template and of the static files manifest, once per process."""
+    digest = hashlib.md5()
+    dirs = {Path(directory) for engine in engines.all() for directory in engine.dirs}
+    dirs.update(Path(directory) for directory in get_app_template_dirs('templates'))
+    for directory in sorted(dirs):
+        for path in sorted(directory.rglob('*')):
+            if path.is_file():
+                digest.update(str(path.relative_to(directory)).encode())
+                digest.update(path.read_bytes())
+    # Set by the manifest storages, which hash the names of static files.
+    digest.update(str(getattr(staticfiles_storage, 'manifest_hash', '')).encode())
+    return digest.hexdigest()
+
+
+def render_page(name):
+    """The page as an anonymous visitor would get it, without the sidebar issues."""
+    from itreporting import views
+
+    # The undecorated view: no query budget, page cache or pre-rendered file.
+    view = inspect.unwrap(getattr(views, name))
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = reverse(f'itreporting:{name}')
+    request.META = {'SERVER_NAME': 'localhost', 'SERVER_PORT': '80'}
+    request.user = AnonymousUser()
+    request.prerendering = True
+    return view(request).content
+
+
+def _write(path, content):
+    # Readers never see a half-written file.
+    temporary = path.with_name(path.name + '.tmp')
+    temporary.write_bytes(content)
+    os.replace(temporary, path)
+
+
+def build(root=None):
+    """Render every page into ``root``; returns {name: (bytes, gzipped bytes)}."""
+    root = Path(root) if root else prerender_root()
+    root.mkdir(parents=True, exist_ok=True)
+    # Before the pages: load() reads it when a page's mtime changes.
+    _write(root / VERSION_FILE, build_version().encode())
+    sizes = {}
+    for name in PAGES:
+        content = render_page(name)
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        # The .html file is written last; load() goes by its mtime.
+        _write(root / f'{name}.html.gz', compressed)
+        _write(root / f'{name}.html', content)
+        sizes[name] = (len(content), len(compressed))
+    return sizes
+
+
+def load(name):
+    """(content, gzipped content, ETag) of a page built for this build_version(), or None."""
+    path = prerender_root() / f'{name}.html'
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    loaded = _loaded.get(name)
+    if loaded is None or loaded[0] != mtime:
+        try:
+            version = (path.parent / VERSION_FILE).read_text()
+        except FileNotFoundError:
+            version = None
+        if version != build_version():
+            page = None
+        else:
+            content = path.read_bytes()
+            try:
+                compressed = path.with_name(path.name + '.gz').read_bytes()
+            except FileNotFoundError:
+                compressed = None
+            page = (content, compressed, f'"{hashlib.md5(content).hexdigest()}"')
+        loaded = _loaded[name] = (mtime, page)
+    return loaded[1]
+
+
+def page_response(request, page):
+    content, compressed, etag = page
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if compressed is not None and ACCEPTS_GZIP.search(request.headers.get('Accept-Encoding', '')):
+            response = HttpResponse(compressed, content_type='text/html; charset=utf-8')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(content, content_type='text/html; charset=utf-8')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=max_age())
+    patch_vary_headers(response, ['Accept-Encoding', 'Cookie'])
+    return response
+
+
+def serve_prerendered(name):
+    """Answer anonymous GETs for a function view from its pre-rendered page, if built."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if _cacheable_request(request):
+                page = load(name)
+                if page is not None:
+                    return page_response(request, page)
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+async def aserve_prerendered(name, request, view, *args, **kwargs):
+    """serve_prerendered() for async views."""
+    if await _acacheable_request(request):
+        page = load(name)
+        if page is not None:
+            return page_response(request, page)
+    return await view(request, *args, **kwargs)
@@ -0,0 +1,97 @@
+"""
+Full-text search over Issue.details and Issue.description.
+
+Production (MySQL) uses a FULLTEXT index, which InnoDB keeps up to date by
+itself. SQLite uses an external-content FTS5 table that triggers keep in sync
+with itreporting_issue, so every write path (views, admin, bulk inserts and
+queryset updates) is covered, not only the ones that send model signals.
+Other databases fall back to case-insensitive substring matching.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from itreporting.models import Issue
+
+FULLTEXT_INDEX = 'issue_fulltext_idx'
+FTS_TABLE = 'itreporting_issue_fts'
+
+SQLITE_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        details, description, content='itreporting_issue', content_rowid='id')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON itreporting_issue BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, details, description) VALUES (new.id, new.details, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON itreporting_issue BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, details, description)
+        VALUES ('delete', old.id, old.details, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF details, description ON itreporting_issue BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, details, description)
+        VALUES ('delete', old.id, old.details, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, details, description) VALUES (new.id, new.details, new.description);
+    END""",
+]
+
+
+def install(schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            f'ALTER TABLE itreporting_issue ADD FULLTEXT INDEX {FULLTEXT_INDEX} (details, description)'
+        )
+    elif schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_SCHEMA:
+            schema_editor.execute(statement)
+
+
+def uninstall(schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(f'ALTER TABLE itreporting_issue DROP INDEX {FULLTEXT_INDEX}')
+    elif schema_editor.connection.vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def rebuild():
+    """Re-index every issue from scratch (SQLite only; MySQL needs nothing)."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def search_issues(query, limit=50, queryset=None):
+    """Return up to ``limit`` issues matching ``query``, best match first."""
+    queryset = Issue.objects.all() if queryset is None else queryset
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return []
+    if connection.vendor == 'mysql':
+        rank = RawSQL(
+            'MATCH (itreporting_issue.details, itreporting_issue.description) '
+            'AGAINST (%s IN NATURAL LANGUAGE MODE)', [' '.join(terms)],
+        )
+        return list(queryset.annotate(rank=rank).filter(rank__gt=0).order_by('-rank')[:limit])
+    if connection.vendor == 'sqlite':
+        match = ' '.join('"%s"' % term for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s ORDER BY bm25({FTS_TABLE}) LIMIT %s',
+                [match, limit],
+            )
+            ranked = cursor.fetchall()
+        issues = queryset.in_bulk([pk for pk, score in ranked])
+        results = []
+        for pk, score in ranked:
+            if pk in issues:
+                issues[pk].rank = -score
+                results.append(issues[pk])
+        return results
+    # No full-text index on other databases: match every term anywhere in
+    # the text, newest first.
+    for term in terms:
+        queryset = queryset.filter(Q(details__icontains=term) | Q(description__icontains=term))
+    return list(queryset.order_by('-date_submitted', '-id')[:limit])
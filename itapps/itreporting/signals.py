@@ -0,0 +1,216 @@
+import threading
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from itreporting import cache, counters, live, search, stats
+from itreporting.models import Issue
+from users.models import Profile
+
+# Sent with issues=[...] after Issue.objects.bulk_create(), which does not
+# send post_save, inside the same transaction. Receivers must not rely on the
+# issues having a pk: MySQL does not return ids from bulk inserts.
+issues_bulk_created = Signal()
+
+# Sent by itreporting.bulk inside the transaction, after one UPDATE applied
+# changes={field attname: value} to issues=[...] (as loaded before it), or
+# after one DELETE removed issues=[...]. Neither sends post_save/post_delete.
+issues_bulk_updated = Signal()
+issues_bulk_deleted = Signal()
+
+# Sent by itreporting.archive inside the transaction, after issues=[...] were
+# copied to ArchivedIssue and deleted from Issue with one DELETE.
+issues_archived = Signal()
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def invalidate_issue_cache(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: cache.invalidate_issue(pk))
+
+
+@receiver(issues_bulk_created, sender=Issue)
+def invalidate_issue_lists(sender, issues, **kwargs):
+    transaction.on_commit(cache.invalidate_issue_lists)
+
+
+@receiver(issues_bulk_updated, sender=Issue)
+@receiver(issues_bulk_deleted, sender=Issue)
+@receiver(issues_archived, sender=Issue)
+def invalidate_bulk_changed_issues(sender, issues, **kwargs):
+    pks = [issue.pk for issue in issues]
+    transaction.on_commit(lambda: cache.invalidate_issue_rows(pks))
+
+
+@receiver(pre_save, sender=Issue)
+def remember_stat_key(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._stats_before = stats.loaded_values(instance)
+
+
+@receiver(post_save, sender=Issue)
+def update_issue_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_stats_before', None)
+    if created or before is None:
+        stats.record([instance])
+    else:
+        stats.record_change(before, stats.issue_values(instance))
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), **stats.issue_values(instance)}
+    instance._stats_before = None
+
+
+@receiver(post_delete, sender=Issue)
+def remove_issue_stats(sender, instance, **kwargs):
+    stats.record([instance], sign=-1)
+
+
+@receiver(issues_bulk_created, sender=Issue)
+def add_bulk_issue_stats(sender, issues, **kwargs):
+    stats.record(issues)
+
+
+@receiver(issues_bulk_updated, sender=Issue)
+def change_bulk_issue_stats(sender, issues, changes, **kwargs):
+    stats.record_changes(issues, changes)
+
+
+@receiver(issues_bulk_deleted, sender=Issue)
+def remove_bulk_issue_stats(sender, issues, **kwargs):
+    stats.record(issues, sign=-1)
+
+
+@receiver(pre_save, sender=Issue)
+def remember_counted_values(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._counts_before = counters.loaded_values(instance)
+
+
+@receiver(post_save, sender=Issue)
+def update_author_counters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_counts_before', None)
+    if created or before is None:
+        counters.record([instance])
+    else:
+        counters.record_change(before, counters.issue_values(instance))
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), **counters.issue_values(instance)}
+    instance._counts_before = None
+
+
+@receiver(post_delete, sender=Issue)
+def remove_from_author_counters(sender, instance, **kwargs):
+    counters.record([instance], sign=-1)
+
+
+@receiver(issues_bulk_created, sender=Issue)
+def add_bulk_author_counters(sender, issues, **kwargs):
+    counters.record(issues)
+
+
+@receiver(issues_bulk_updated, sender=Issue)
+def change_bulk_author_counters(sender, issues, changes, **kwargs):
+    counters.record_changes(issues, changes)
+
+
+@receiver(issues_bulk_deleted, sender=Issue)
+def remove_bulk_author_counters(sender, issues, **kwargs):
+    counters.record(issues, sign=-1)
+
+
+@receiver(issues_archived, sender=Issue)
+def archive_author_counters(sender, issues, **kwargs):
+    counters.record_archived(issues)
+
+
+@receiver(post_save, sender=Issue)
+def publish_saved_issue(sender, instance, raw=False, **kwargs):
+    if not raw and live.enabled():
+        transaction.on_commit(lambda: live.publish_issues([instance]))
+
+
+@receiver(post_delete, sender=Issue)
+def publish_deleted_issue(sender, instance, **kwargs):
+    if live.enabled():
+        pk = instance.pk
+        transaction.on_commit(lambda: live.publish_removed([pk]))
+
+
+@receiver(issues_bulk_created, sender=Issue)
+def publish_bulk_created_issues(sender, issues, **kwargs):
+    issues = [issue for issue in issues if issue.pk is not None]
+    if issues and live.enabled():
+        transaction.on_commit(lambda: live.publish_issues(issues))
+
+
+@receiver(issues_bulk_updated, sender=Issue)
+def publish_bulk_updated_issues(sender, issues, **kwargs):
+    if live.enabled():
+        pks = [issue.pk for issue in issues]
+        transaction.on_commit(lambda: live.publish_ids(pks))
+
+
+@receiver(issues_bulk_deleted, sender=Issue)
+@receiver(issues_archived, sender=Issue)
+def publish_removed_issues(sender, issues, **kwargs):
+    if live.enabled():
+        pks = [issue.pk for issue in issues]
+        transaction.on_commit(lambda: live.publish_removed(pks))
+
+
+# Authors whose report rows are stale, per thread and database alias, until
+# the transaction that saved them commits.
+_pending = threading.local()
+
+
+def _pending_authors(using):
+    if not hasattr(_pending, 'authors'):
+        _pending.authors = {}
+    return _pending.authors.setdefault(using, set())
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def invalidate_author_rows(sender, instance, created=False, update_fields=None, using=DEFAULT_DB_ALIAS, **kwargs):
+    # Report rows show the author's name; logins only touch last_login.
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    pending = _pending_authors(using)
+    if transaction.get_autocommit(using):
+        # No transaction is open, so whatever is left came from one that
+        # was rolled back.
+        pending.clear()
+    pending.add(instance.pk if sender is User else instance.user_id)
+    # The profile page saves the user and the profile together: the first
+    # callback reads their issues and bumps the version, the second finds
+    # nothing left to do.
+    transaction.on_commit(lambda: invalidate_pending_authors(using), using=using)
+
+
+def invalidate_pending_authors(using):
+    pending = _pending_authors(using)
+    if not pending:
+        return
+    user_ids = list(pending)
+    pending.clear()
+    pks = list(Issue.objects.using(using).filter(author_id__in=user_ids).values_list('pk', flat=True))
+    if pks:
+        cache.invalidate_issue_rows(pks)
+
+
+def ensure_search_schema(using, **kwargs):
+    # SQLite drops triggers when a migration rebuilds itreporting_issue to
+    # alter it, so put the FTS triggers back after every migrate run.
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    if ('itreporting', '0005_issue_fulltext') not in MigrationRecorder(connection).applied_migrations():
+        return
+    with connection.schema_editor() as schema_editor:
+        search.install(schema_editor)
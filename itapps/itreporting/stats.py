@@ -0,0 +1,126 @@
+"""
+Incrementally maintained issue statistics.
+
+IssueStat holds one counter per (day, room, type, urgent), archived issues
+included (see itreporting.archive). Issue writes adjust the affected counters
+with F() expressions, in the same transaction as the write, so the dashboard
+never has to aggregate over the Issue table.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from itreporting.models import ArchivedIssue, Issue, IssueStat
+
+KEY_FIELDS = ('date_submitted', 'room', 'type', 'urgent')
+
+
+def stat_key(values):
+    """values: a mapping with the KEY_FIELDS of one issue."""
+    return (timezone.localdate(values['date_submitted']), values['room'], values['type'], values['urgent'])
+
+
+def issue_values(issue):
+    return {name: getattr(issue, name) for name in KEY_FIELDS}
+
+
+def loaded_values(issue):
+    """The KEY_FIELDS of ``issue`` as they are stored, before unsaved edits."""
+    loaded = getattr(issue, '_loaded_values', {})
+    if all(name in loaded for name in KEY_FIELDS):
+        return loaded
+    return Issue.objects.filter(pk=issue.pk).values(*KEY_FIELDS).first()
+
+
+# Bulk inserts touch many counters at once; from this many on, apply() reads
+# the existing rows in one query and writes them back in batches.
+BULK_THRESHOLD = 50
+
+
+def apply(deltas):
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if len(deltas) >= BULK_THRESHOLD:
+        try:
+            with transaction.atomic():
+                apply_bulk(deltas)
+            return
+        except IntegrityError:
+            # Another writer created some of the rows; go key by key.
+            pass
+    for (day, room, type, urgent), delta in deltas.items():
+        key = {'day': day, 'room': room, 'type': type, 'urgent': urgent}
+        if IssueStat.objects.filter(**key).update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                IssueStat.objects.create(count=delta, **key)
+        except IntegrityError:
+            # Another writer created the row first.
+            IssueStat.objects.filter(**key).update(count=F('count') + delta)
+
+
+def apply_bulk(deltas, batch_size=1000):
+    days = {day for day, room, type, urgent in deltas}
+    # The row locks keep concurrent writers from losing each other's updates.
+    rows = {
+        (stat.day, stat.room, stat.type, stat.urgent): stat
+        for stat in IssueStat.objects.select_for_update().filter(day__in=days)
+    }
+    changed, created = [], []
+    for (day, room, type, urgent), delta in deltas.items():
+        stat = rows.get((day, room, type, urgent))
+        if stat is None:
+            created.append(IssueStat(day=day, room=room, type=type, urgent=urgent, count=delta))
+        else:
+            stat.count += delta
+            changed.append(stat)
+    IssueStat.objects.bulk_update(changed, ['count'], batch_size=batch_size)
+    IssueStat.objects.bulk_create(created, batch_size=batch_size)
+
+
+def record(issues, sign=1):
+    deltas = Counter()
+    for issue in issues:
+        deltas[stat_key(issue_values(issue))] += sign
+    apply(deltas)
+
+
+def record_change(before, after):
+    old, new = stat_key(before), stat_key(after)
+    if old != new:
+        apply(Counter({old: -1, new: 1}))
+
+
+def record_changes(issues, changes):
+    """``issues`` as loaded, before one UPDATE applied ``changes`` to all of them."""
+    deltas = Counter()
+    for issue in issues:
+        before = issue_values(issue)
+        deltas[stat_key(before)] -= 1
+        deltas[stat_key({**before, **changes})] += 1
+    apply(deltas)
+
+
+def rebuild(batch_size=1000):
+    """Recompute every counter from the Issue and ArchivedIssue tables."""
+    counts = Counter()
+    for model in (Issue, ArchivedIssue):
+        rows = (
+            model.objects.annotate(day=TruncDate('date_submitted'))
+            .values_list('day', 'room', 'type', 'urgent')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        for day, room, type, urgent, count in rows.iterator(chunk_size=batch_size):
+            counts[day, room, type, urgent] += count
+    with transaction.atomic():
+        IssueStat.objects.all().delete()
+        IssueStat.objects.bulk_create(
+            (IssueStat(day=day, room=room, type=type, urgent=urgent, count=count)
+             for (day, room, type, urgent), count in counts.items()),
+            batch_size=batch_size,
+        )
+    return len(counts)
@@ -0,0 +1,19 @@
+from django import template
+
+from itreporting.models import Issue
+
+register = template.Library()
+
+
+def latest_issues_queryset(count=5):
+    issues = Issue.objects.only('id', 'type', 'room', 'date_submitted').order_by('-date_submitted', '-id')
+    return issues[:count]
+
+
+@register.inclusion_tag('itreporting/latest_issues.html', takes_context=True)
+def latest_issues(context, count=5):
+    # Async views cannot query from a template, so they pass the list in.
+    issues = context.get('latest_issues')
+    if issues is None:
+        issues = latest_issues_queryset(count)
+    return {'latest_issues': issues}
@@ -5,20 +5,39 @@ from django.conf import settings
 from django.conf.urls.static import static 
 from .views import PostListView, PostDetailView, PostCreateView, PostUpdateView
 from .views import PostListView, PostDetailView, PostCreateView, PostUpdateView, PostDeleteView
+from .views import IssueSearchView, MyIssuesView
+from . import api, async_views, live
+
+
+if settings.ASYNC_VIEWS:
+    home_view, report_view, issue_detail_view = async_views.home, async_views.report, async_views.issue_detail
+else:
+    home_view, report_view, issue_detail_view = views.home, PostListView.as_view(), PostDetailView.as_view()
 
 
 app_name = 'itreporting'
 
 urlpatterns = [
 
-    path('',views.home, name= 'home'),
+    path('',home_view, name= 'home'),
     path('aboutus',views.aboutus, name= 'aboutus'),
     path('contactus',views.contactus, name= 'contactus'),    
-    path('report/', PostListView.as_view(), name = 'report'),
-    path('issues/<int:pk>', PostDetailView.as_view(), name = 'issue-detail'),
+    path('latest-issues', views.latest_issues, name = 'latest-issues'),
+    path('report/', report_view, name = 'report'),
+    path('search/', IssueSearchView.as_view(), name = 'search'),
+    path('my-issues/', MyIssuesView.as_view(), name = 'my-issues'),
+    path('api/issues/', api.issue_list, name = 'api-issues'),
+    path('api/issues/<int:pk>', api.issue_detail, name = 'api-issue'),
+    path('report/export/', views.export_issues, name = 'export'),
+    path('dashboard/', views.dashboard, name = 'dashboard'),
+    path('issues/<int:pk>', issue_detail_view, name = 'issue-detail'),
     path('issue/new/', PostCreateView.as_view(), name = 'issue-create'),
     path('issues/<int:pk>/update/', PostUpdateView.as_view(), name = 'issue-update'),
     path('issue/<int:pk>/delete/', PostDeleteView.as_view(), name = 'issue-delete'),
 ]
 
+if settings.ASYNC_VIEWS:
+    # A stream per client only scales on the ASGI server.
+    urlpatterns.append(path('report/live', live.issue_feed, name = 'issue-feed'))
+
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
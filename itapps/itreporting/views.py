@@ -1,67 +1,219 @@
-from django.shortcuts import render
-from django.http import HttpResponse
-from itreporting.models import Issue
+import uuid
+
+from django.core.handlers.asgi import ASGIRequest
+from django.shortcuts import redirect, render
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from itreporting.models import ArchivedIssue, Issue, IssueStat
 from django.views.generic import ListView,DetailView,CreateView,UpdateView,DeleteView
 from django.urls import reverse_lazy
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+import datetime
 from itreporting.models import Issue
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.decorators import login_required
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.views.generic.edit import DeleteView
-
+from itreporting import ingest
+from itreporting.cache import AnonymousCacheMixin, cache_for_anonymous, issue_page_key
+from itreporting.export import FORMATS, aexport_stream, export_stream
+from itreporting.forms import IssueFilterForm
+from itreporting.pagination import CursorPaginationMixin
+from itreporting.prerender import serve_prerendered
+from itreporting.search import search_issues
+from itreporting.templatetags.itreporting_tags import latest_issues_queryset
+from itapps.querybudget import QueryBudgetMixin, query_budget
+
+@query_budget(3)
+@serve_prerendered('home')
+@cache_for_anonymous()
 def home(request):
 
     return render (request, 'itreporting/home.html', {'title':'Welcome'})
 
+@query_budget(3)
+@serve_prerendered('aboutus')
+@cache_for_anonymous()
 def aboutus(request):
 
     return render (request, 'itreporting/aboutus.html', {'title':'About Us'})
 
+@query_budget(3)
+@serve_prerendered('contactus')
+@cache_for_anonymous()
 def contactus(request):
 
     return render (request, 'itreporting/contactus.html', {'title':'Contact Us'})
 
+@query_budget(3)
+@cache_for_anonymous()
+def latest_issues(request):
+    # The sidebar of the pre-rendered pages (see itreporting.prerender).
+    return render(request, 'itreporting/latest_issues.html', {'latest_issues': latest_issues_queryset()})
+
 def report(request):
     issues = issues.objects.all()
     context = {'issues':issues}
     return render (request,'itreporting/report.html', context)
 
+@query_budget(3)
 def report (request):
     daily_report = {'issues': Issue.objects.all(), 'title': 'Issues Reported'}
     return render(request,'itreporting/report.html',daily_report)
 # Create your views here.
 
-class PostListView(ListView):
+@query_budget(7)
+@login_required
+def dashboard(request):
+    # Reads only the IssueStat rollup, whose size depends on days x rooms
+    # rather than on the number of issues.
+    since = timezone.localdate() - datetime.timedelta(days=29)
+    totals = IssueStat.objects.values
+    context = {
+        'title': 'Dashboard',
+        'since': since,
+        'per_day': totals('day').filter(day__gte=since).annotate(total=Sum('count')).order_by('day'),
+        'per_room': totals('room').annotate(total=Sum('count')).filter(total__gt=0).order_by('-total')[:20],
+        'per_type': totals('type').annotate(total=Sum('count')).order_by('type'),
+        'per_urgent': totals('urgent').annotate(total=Sum('count')).order_by('-urgent'),
+    }
+    return render(request, 'itreporting/dashboard.html', context)
+
+# No query budget: the export's queries run while the response streams,
+# after the view has returned (ExportTests counts them).
+@login_required
+def export_issues(request):
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        fmt = 'csv'
+    compress = request.GET.get('gzip') in ('1', 'true')
+    content_type, extension = FORMATS[fmt]
+    queryset = IssueFilterForm(request.GET).filter(Issue.objects.all())
+    filename = f'issues.{extension}' + ('.gz' if compress else '')
+    stream = aexport_stream if isinstance(request, ASGIRequest) else export_stream
+    response = StreamingHttpResponse(
+        stream(queryset, fmt, compress),
+        content_type='application/gzip' if compress else content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+class PostListView(QueryBudgetMixin, AnonymousCacheMixin, CursorPaginationMixin, ListView):
     model = Issue
-    ordering = ['-date_submitted'] #one "t" due to ordering issue < that was old, I remigrated everything 
+    # Rows show issue.summary; the full text is only on the detail page.
+    queryset = Issue.objects.select_related('author__profile').defer('details', 'description')
+    query_budget = 4
+    ordering = ['-date_submitted', '-id'] #one "t" due to ordering issue < that was old, I remigrated everything 
     template_name = 'itreporting/report.html'
     context_object_name = 'issues'
     paginate_by = 5 #Optinal pagination...??
 
+    def get_queryset(self):
+        self.filter_form = IssueFilterForm(self.request.GET)
+        return self.filter_form.filter(super().get_queryset())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['filter_form'] = self.filter_form
+        return context
+
+
+class MyIssuesView(QueryBudgetMixin, LoginRequiredMixin, CursorPaginationMixin, ListView):
+    # Session, user (with the counts on their profile), one query over
+    # issue_author_date_idx and the sidebar counts, with nothing cached yet.
+    query_budget = 4
+    template_name = 'itreporting/my_issues.html'
+    context_object_name = 'issues'
+    paginate_by = 10
+
+    def get_queryset(self):
+        return (Issue.objects.filter(author=self.request.user).defer('details', 'description')
+                .order_by('-date_submitted', '-id'))
+
+
+class IssueSearchView(QueryBudgetMixin, ListView):
+    template_name = 'itreporting/search.html'
+    context_object_name = 'issues'
+    query_budget = 5
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        return search_issues(
+            self.query, queryset=Issue.objects.select_related('author__profile').defer('details', 'description'),
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(query=self.query, title='Search Issues')
+        return context
+
     
-class PostDetailView(DetailView):
+class PostDetailView(QueryBudgetMixin, AnonymousCacheMixin, DetailView):
     model = Issue
+    queryset = Issue.objects.select_related('author__profile')
+    archive_queryset = ArchivedIssue.objects.select_related('author__profile')
+    query_budget = 3
     template_name = 'itreporting/issue_detail.html'
 
-class PostCreateView(LoginRequiredMixin,CreateView):
+    def cache_key(self):
+        return issue_page_key(self.kwargs['pk'])
+
+    def get_object(self, queryset=None):
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            # Old issues are moved to the archive with the same id.
+            return super().get_object(self.archive_queryset)
+
+class SingleIssueMixin:
+    # test_func() and get()/post() both call get_object(); fetch the row once.
+    def get_object(self, queryset=None):
+        if not hasattr(self, '_issue'):
+            self._issue = super().get_object(queryset)
+        return self._issue
+
+class PostCreateView(QueryBudgetMixin, LoginRequiredMixin,CreateView):
     model = Issue
+    # The issue itself is written by the ingest thread (see itreporting.ingest).
+    query_budget = 4
     fields = ['type','room','urgent','details']
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # A double click posts the same key twice.
+        context['idempotency_key'] = self.request.POST.get('idempotency_key') or uuid.uuid4().hex
+        return context
+
     def form_valid(self,form):
         
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        try:
+            issue_id = ingest.submit(form.instance, self.request.POST.get('idempotency_key', '')[:64] or None)
+        except ingest.Busy:
+            form.add_error(None, 'Too many issues are being reported right now. Please try again in a minute.')
+            response = self.form_invalid(form)
+            response.status_code = 503
+            response['Retry-After'] = '60'
+            return response
+        return redirect('itreporting:issue-detail', pk=issue_id)
     
-class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView): 
+class PostUpdateView(QueryBudgetMixin, LoginRequiredMixin, UserPassesTestMixin, SingleIssueMixin, UpdateView): 
     model = Issue
+    query_budget = 10
     fields = ['type', 'room', 'details']
 
+    @transaction.atomic
+    def form_valid(self, form):
+        return super().form_valid(form)
+
     def test_func(self):
 
         issue = self.get_object()
 
-        return self.request.user == issue.author
+        return self.request.user.pk == issue.author_id
 
 
 class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
@@ -70,15 +222,18 @@ class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
     success_url = '/report'
 
-class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class PostDeleteView(QueryBudgetMixin, LoginRequiredMixin, UserPassesTestMixin, SingleIssueMixin, DeleteView):
 
     model = Issue
 
     success_url = '/report'
+    # Issue has post_delete receivers, so the delete re-selects the row; the
+    # commit bumps IssuesVersion.
+    query_budget = 8
     
     def test_func(self):
 
         issue = self.get_object()
 
-        return self.request.user == issue.author
+        return self.request.user.pk == issue.author_id
 
@@ -1,5 +1,74 @@
-from django.contrib import admin
+import io
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
 from .models import Profile
+from .provisioning import RosterError, provision, read_roster
 
-admin.site.register(Profile)
 # Register your models here.
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'open_issues', 'urgent_issues', 'total_issues')
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'user__first_name', 'user__last_name')
+    raw_id_fields = ('user',)
+    readonly_fields = ('open_issues', 'urgent_issues', 'total_issues')
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class RosterForm(forms.Form):
+    roster = forms.FileField(help_text='CSV with a header row: username, and optionally email, '
+                                       'first_name, last_name and password.')
+
+
+def admin_max_passwords():
+    return getattr(settings, 'PROVISION_ADMIN_MAX_PASSWORDS', 50)
+
+
+class StudentUserAdmin(UserAdmin):
+    change_list_template = 'admin/users/user_change_list.html'
+
+    def get_urls(self):
+        return [
+            path('provision/', self.admin_site.admin_view(self.provision_view), name='users_provision'),
+        ] + super().get_urls()
+
+    def provision_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:auth_user_changelist')
+        form = RosterForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            stream = io.TextIOWrapper(form.cleaned_data['roster'].file, encoding='utf-8-sig', newline='')
+            try:
+                records = list(read_roster(stream))
+                passwords = sum(1 for line, row in records if row['password'])
+                if passwords > admin_max_passwords():
+                    raise RosterError(
+                        f'This roster has {passwords} passwords to hash, more than the {admin_max_passwords()} '
+                        f'that can be done here. Run "python manage.py provision_students <roster.csv>" on the '
+                        f'server instead.')
+                result = provision(records)
+            except (RosterError, UnicodeDecodeError) as exc:
+                form.add_error('roster', str(exc))
+            else:
+                self.message_user(request, str(result), messages.SUCCESS)
+                for line, message in result.invalid[:20]:
+                    self.message_user(request, f'Line {line}: {message}', messages.WARNING)
+                return redirect('admin:auth_user_changelist')
+        context = dict(self.admin_site.each_context(request), title='Provision students', form=form,
+                       opts=self.model._meta, max_passwords=admin_max_passwords())
+        return TemplateResponse(request, 'admin/users/provision.html', context)
+
+
+admin.site.unregister(User)
+admin.site.register(User, StudentUserAdmin)
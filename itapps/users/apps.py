@@ -1,7 +1,10 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
     def ready(self):
-      from itapps.signals import create_profile 
+      from users import signals  # noqa: F401
+      from users.thumbnails import profile_saved
+      post_save.connect(profile_saved, sender=self.get_model('Profile'), dispatch_uid='users.thumbnails')
@@ -0,0 +1,90 @@
+"""
+Authentication backend that caches the logged-in user.
+
+AuthenticationMiddleware looks the user up on every request, and most pages
+then read user.profile. CachedModelBackend keeps the User with its Profile
+attached in the "users" cache, so an authenticated request with the
+cached_db session engine usually needs no queries before the view.
+
+That cache is local memory: a User carries its password hash, which must not
+be written to a shared file cache. What is shared is a random stamp per user
+in the default cache. A cached user is only used while its stamp is current,
+and the stamp is deleted when the user or profile is saved or deleted (which
+covers profile updates, password changes and last_login), when their groups
+or permissions change, and on logout; see users.signals. So a change made in
+one worker reaches all of them.
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache, caches
+
+UserModel = get_user_model()
+
+
+def user_cache_key(user_id):
+    return f'users:user:{user_id}'
+
+
+def user_stamp_key(user_id):
+    return f'users:stamp:{user_id}'
+
+
+def user_cache_timeout():
+    return getattr(settings, 'USER_CACHE_TIMEOUT', 300)
+
+
+def local_cache():
+    return caches[getattr(settings, 'USER_CACHE_ALIAS', 'users')]
+
+
+def invalidate_user(user_id):
+    invalidate_users([user_id])
+
+
+def invalidate_users(user_ids):
+    cache.delete_many([user_stamp_key(user_id) for user_id in user_ids])
+    local_cache().delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+class CachedModelBackend(ModelBackend):
+    def _queryset(self):
+        return UserModel._default_manager.select_related('profile')
+
+    def get_user(self, user_id):
+        # Read the stamp before the user, so that a change committed in
+        # between leaves the new entry with a stamp that is already gone.
+        stamp_key = user_stamp_key(user_id)
+        stamp = cache.get(stamp_key)
+        if stamp is None:
+            cache.add(stamp_key, uuid.uuid4().hex, user_cache_timeout())
+            stamp = cache.get(stamp_key)
+        key = user_cache_key(user_id)
+        entry = local_cache().get(key)
+        if entry is not None and entry[0] == stamp:
+            user = entry[1]
+        else:
+            user = self._queryset().filter(pk=user_id).first()
+            if user is None:
+                return None
+            local_cache().set(key, (stamp, user), user_cache_timeout())
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        stamp_key = user_stamp_key(user_id)
+        stamp = await cache.aget(stamp_key)
+        if stamp is None:
+            await cache.aadd(stamp_key, uuid.uuid4().hex, user_cache_timeout())
+            stamp = await cache.aget(stamp_key)
+        key = user_cache_key(user_id)
+        entry = await local_cache().aget(key)
+        if entry is not None and entry[0] == stamp:
+            user = entry[1]
+        else:
+            user = await self._queryset().filter(pk=user_id).afirst()
+            if user is None:
+                return None
+            await local_cache().aset(key, (stamp, user), user_cache_timeout())
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from users import thumbnails
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = 'Create thumbnails for profiles whose image has none yet (or all profiles with --force).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--force', action='store_true', help='Re-render thumbnails that already exist.')
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.only('pk', 'image', 'thumbnail_webp', 'thumbnail_jpeg').order_by('pk')
+        pending = [profile.pk for profile in profiles.iterator(chunk_size=2000)
+                   if options['force'] or not profile.thumbnails_current()]
+        created = failed = 0
+        with ThreadPoolExecutor(options['workers']) as pool:
+            futures = [(pk, pool.submit(thumbnails.generate, pk, options['force'])) for pk in pending]
+            for pk, future in futures:
+                try:
+                    created += bool(future.result())
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'Profile {pk}: {exc}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} of {len(pending)} profiles updated; {failed} failed.'
+        ))
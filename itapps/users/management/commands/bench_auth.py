@@ -0,0 +1,106 @@
+import json
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from itreporting.benchmarking import percentile
+from itreporting.models import Issue
+
+CONFIGS = {
+    # The settings before sessions and users were cached.
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+    },
+    'cached': {},
+}
+
+
+class Command(BaseCommand):
+    help = ('Request pages as a logged-in user with database sessions and user lookups, and '
+            'with the cached session engine and users.backends.CachedModelBackend, and compare '
+            'SQL queries and latency per request. The first request to each page is made with '
+            'an empty cache, as after a restart, and checked against the view\'s query budget. '
+            'Runs against the configured database and cache, which is cleared.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Requests per page and configuration.')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(f'bench-auth-{uuid.uuid4().hex[:12]}', password=uuid.uuid4().hex)
+        try:
+            results = {name: self.measure(user, overrides, options['requests']) for name, overrides in CONFIGS.items()}
+        finally:
+            user.delete()
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f'{"page":<28} {"config":<7} {"cold":>5} {"budget":>6} {"queries":>8} '
+                          f'{"p50 ms":>8} {"p95 ms":>8}')
+        over = 0
+        for page in results['db']:
+            for name in CONFIGS:
+                result = results[name][page]
+                budget = result['budget']
+                flag = ''
+                if name == 'cached' and budget is not None and result['cold_queries'] > budget:
+                    over += 1
+                    flag = '  OVER BUDGET'
+                self.stdout.write(f'{page:<28} {name:<7} {result["cold_queries"]:>5} '
+                                  f'{"-" if budget is None else budget:>6} {result["queries_per_request"]:>8} '
+                                  f'{result["p50_ms"]:>8} {result["p95_ms"]:>8}{flag}')
+        if over:
+            self.stderr.write(self.style.ERROR(f'{over} pages go over their query budget with an empty cache.'))
+
+    def pages(self):
+        pages = [('get', reverse('itreporting:home')), ('get', reverse('itreporting:report')),
+                 ('get', reverse('profile'))]
+        issue_pk = Issue.objects.order_by('-pk').values_list('pk', flat=True).first()
+        if issue_pk:
+            pages.append(('get', reverse('itreporting:issue-detail', args=[issue_pk])))
+        # Logs the user out, so they are logged in again before every request.
+        pages.append(('post', reverse('logout')))
+        return pages
+
+    def measure(self, user, overrides, requests):
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['*'], QUERY_BUDGET_STRICT=False, **overrides):
+            client = Client()
+            client.force_login(user)
+            for method, page in self.pages():
+                label = f'{method.upper()} {page}'
+                cold = self.request(client, user, method, page, clear_cache=True)
+                queries, latencies = 0, []
+                for _ in range(requests):
+                    response = self.request(client, user, method, page)
+                    latencies.append(response.elapsed)
+                    queries += response.queries
+                results[label] = {
+                    'cold_queries': cold.queries,
+                    'budget': getattr(cold, 'query_budget', None),
+                    'queries_per_request': round(queries / requests, 2),
+                    'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+                    'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+                }
+        return results
+
+    def request(self, client, user, method, page, clear_cache=False):
+        if '_auth_user_id' not in client.session:
+            client.force_login(user)
+        if clear_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = getattr(client, method)(page)
+            response.elapsed = time.perf_counter() - start
+        response.queries = len(captured)
+        close_old_connections()
+        return response
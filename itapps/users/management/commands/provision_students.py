@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.provisioning import RosterError, provision, read_roster
+
+
+class Command(BaseCommand):
+    help = ('Create student accounts and their profiles from a CSV roster with a header row: '
+            'username, and optionally email, first_name, last_name and password. '
+            'Existing usernames are skipped.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('roster', help='Path to the roster CSV file.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, help='Password hashing processes (default: one per CPU).')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be created.')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['roster'], newline='', encoding='utf-8-sig') as stream:
+                result = provision(read_roster(stream), options['batch_size'], options['workers'], options['dry_run'])
+        except (OSError, RosterError) as exc:
+            raise CommandError(exc)
+        for line, message in result.invalid:
+            self.stderr.write(f'Line {line}: {message}')
+        if options['dry_run']:
+            self.stdout.write(f'Dry run: {len(result.created)} accounts would be created, '
+                              f'{len(result.existing)} already exist, {len(result.invalid)} invalid rows.')
+        else:
+            self.stdout.write(self.style.SUCCESS(str(result)))
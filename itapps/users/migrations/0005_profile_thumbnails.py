@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_alter_profile_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='thumbnail_jpeg',
+            field=models.ImageField(blank=True, editable=False, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='thumbnail_webp',
+            field=models.ImageField(blank=True, editable=False, upload_to=''),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:47
+
+from django.db import migrations, models
+
+
+def count_issues(apps, schema_editor):
+    Issue = apps.get_model('itreporting', 'Issue')
+    Profile = apps.get_model('users', 'Profile')
+    from django.db.models import Count, Q
+    rows = (
+        Issue.objects.order_by().values('author_id')
+        .annotate(total=Count('id'), urgent=Count('id', filter=Q(urgent=True)))
+    )
+    for row in rows.iterator():
+        Profile.objects.filter(user_id=row['author_id']).update(
+            open_issues=row['total'], urgent_issues=row['urgent'], total_issues=row['total'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_profile_thumbnails'),
+        ('itreporting', '0006_issuestat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='open_issues',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='total_issues',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='urgent_issues',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_issues, migrations.RunPython.noop),
+    ]
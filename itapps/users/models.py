@@ -1,3 +1,5 @@
+import os
+
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -5,6 +7,23 @@ from django.contrib.auth.models import User
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     image = models.ImageField(default='profile_pics/default.png', upload_to='profile_pics')
+    # Filled in by users.thumbnails after each upload; blank until then.
+    thumbnail_webp = models.ImageField(blank=True, editable=False)
+    thumbnail_jpeg = models.ImageField(blank=True, editable=False)
+    # Kept up to date by itreporting.counters; repair with reconcile_issue_counts.
+    open_issues = models.IntegerField(default=0, editable=False)
+    urgent_issues = models.IntegerField(default=0, editable=False)
+    total_issues = models.IntegerField(default=0, editable=False)
 
     def __str__(self):
         return f'{self.user.first_name} {self.user.last_name}'
+
+    def thumbnails_current(self):
+        # Thumbnails are named after the image they were made from.
+        stem = os.path.splitext(self.image.name)[0] + '.'
+        return self.thumbnail_webp.name.startswith(stem) and self.thumbnail_jpeg.name.startswith(stem)
+
+    @property
+    def thumbnail_url(self):
+        # Until the thumbnails of a new image are made, show the image itself.
+        return self.thumbnail_jpeg.url if self.thumbnail_jpeg and self.thumbnails_current() else self.image.url
@@ -0,0 +1,118 @@
+"""
+Bulk student account provisioning from a roster file.
+
+A roster is a CSV file with a header row. ``username`` is required;
+``email``, ``first_name``, ``last_name`` and ``password`` are optional. Rows
+without a password get an unusable one, which can be set from the admin later.
+
+Users and their profiles are created with bulk_create in batches, so no
+post_save receivers run. Each batch inserts the users and exactly one
+profile per user in one transaction. Password hashing is deliberately slow,
+so it is spread over a process pool. Usernames that already exist,
+ignoring case, are skipped; all existing usernames are read with one query
+up front.
+"""
+import csv
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from users.models import Profile
+
+COLUMNS = ('username', 'email', 'first_name', 'last_name', 'password')
+
+
+class RosterError(ValueError):
+    pass
+
+
+class ProvisionResult:
+    def __init__(self):
+        self.created = []
+        self.existing = []
+        self.invalid = []  # (line number, message)
+
+    def __str__(self):
+        return (f'{len(self.created)} accounts created, {len(self.existing)} already existed, '
+                f'{len(self.invalid)} invalid rows.')
+
+
+def read_roster(stream):
+    """Yield (line number, row dict) for each record of a CSV roster."""
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or 'username' not in reader.fieldnames:
+        raise RosterError('The roster needs a header row with a "username" column.')
+    for row in reader:
+        yield reader.line_num, {name: (row.get(name) or '').strip() for name in COLUMNS}
+
+
+def clean_row(row):
+    username_field = User._meta.get_field('username')
+    try:
+        username_field.clean(row['username'], None)
+        if row['email']:
+            validate_email(row['email'])
+    except ValidationError as exc:
+        raise RosterError('; '.join(exc.messages))
+
+
+def _setup_worker():
+    # Spawned workers start without Django; DJANGO_SETTINGS_MODULE is inherited.
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """Return make_password() of each password, computed in a process pool."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(passwords) < 2 * workers:
+        return [make_password(password) for password in passwords]
+    # Spawned rather than forked: the caller may be a threaded web server.
+    context = multiprocessing.get_context('spawn')
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_setup_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def provision(records, batch_size=1000, workers=None, dry_run=False):
+    """Create the users and profiles for ``records`` from read_roster()."""
+    result = ProvisionResult()
+    taken = {username.lower() for username in User.objects.values_list('username', flat=True)}
+    accepted = []
+    for line, row in records:
+        try:
+            clean_row(row)
+        except RosterError as exc:
+            result.invalid.append((line, str(exc)))
+            continue
+        if row['username'].lower() in taken:
+            result.existing.append(row['username'])
+            continue
+        taken.add(row['username'].lower())
+        accepted.append(row)
+    if dry_run:
+        result.created = [row['username'] for row in accepted]
+        return result
+
+    # Blank passwords become make_password(None), an unusable password.
+    hashes = hash_passwords([row['password'] or None for row in accepted], workers)
+    for start in range(0, len(accepted), batch_size):
+        rows = accepted[start:start + batch_size]
+        users = [
+            User(username=row['username'], email=row['email'], first_name=row['first_name'],
+                 last_name=row['last_name'], password=password)
+            for row, password in zip(rows, hashes[start:start + batch_size])
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            # MySQL does not return the ids of bulk inserted rows.
+            user_ids = User.objects.filter(username__in=[user.username for user in users]).values_list('pk', flat=True)
+            Profile.objects.bulk_create([Profile(user_id=pk) for pk in user_ids])
+        result.created += [user.username for user in users]
+    return result
@@ -1,11 +1,53 @@
-from django.db.models.signals import post_save
 from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
+
+from .backends import invalidate_user, invalidate_users
 from .models import Profile
 
-@receiver(post_save, sender=User)
+# The only profile receiver (connected once, see dispatch_uid);
+# users.provisioning creates profiles itself, since bulk_create does not send
+# post_save.
+@receiver(post_save, sender=User, dispatch_uid='users.create_profile')
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.create(user=instance)
+
+
+# Drop the user from the users.backends cache on any change (profile
+# updates, password changes, last_login, groups and permissions) and on
+# logout.
+@receiver(post_save, sender=User, dispatch_uid='users.invalidate_user')
+@receiver(post_delete, sender=User, dispatch_uid='users.invalidate_user_deleted')
+@receiver(post_save, sender=Profile, dispatch_uid='users.invalidate_profile')
+@receiver(post_delete, sender=Profile, dispatch_uid='users.invalidate_profile_deleted')
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_id = instance.pk if sender is User else instance.user_id
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid='users.invalidate_groups')
+@receiver(m2m_changed, sender=User.user_permissions.through, dispatch_uid='users.invalidate_permissions')
+def invalidate_cached_user_access(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            user_id = instance.pk
+            transaction.on_commit(lambda: invalidate_user(user_id))
+        return
+    # Changed from the group or permission side: pk_set holds user ids,
+    # except for clear(), whose users have to be read before they go.
+    if action in ('post_add', 'post_remove'):
+        user_ids = list(pk_set)
+    elif action == 'pre_clear':
+        user_ids = list(sender.objects.filter(**{instance._meta.model_name: instance}).values_list('user_id', flat=True))
+    else:
+        return
+    transaction.on_commit(lambda: invalidate_users(user_ids))
+
 
-def create_profile(sender, instance, created, **kwargs):
-    
-    if created:
-        Profile.objects.create(user=instance)
\ No newline at end of file
+@receiver(user_logged_out, dispatch_uid='users.logged_out')
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
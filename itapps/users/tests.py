@@ -1,3 +1,259 @@
-from django.test import TestCase
+import io
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache, caches
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.loader import render_to_string
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from itreporting.tests import BUDGET_SETTINGS, ColdCacheBudgetMixin, make_issue
+from users import thumbnails
+from users.backends import CachedModelBackend
+from users.forms import ProfileUpdateForm
+from users.models import Profile
+
+
+@override_settings(**BUDGET_SETTINGS)
+class QueryBudgetTests(ColdCacheBudgetMixin, TransactionTestCase):
+    """Writes commit, so the queries run by on_commit callbacks are counted too."""
+
+    def setUp(self):
+        patcher = mock.patch('users.thumbnails.schedule')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('amy', password='secret', first_name='Amy', last_name='Pond')
+        # Renaming an author invalidates their issues' rows.
+        make_issue(self.user)
+
+    def test_register(self):
+        self.request('get', reverse('register'), status=200)
+        self.request('post', reverse('register'), {
+            'username': 'rory', 'email': 'rory@example.com',
+            'password1': 'a-long-passphrase', 'password2': 'a-long-passphrase',
+        }, status=302)
+        self.assertTrue(User.objects.filter(username='rory').exists())
+
+    def test_login(self):
+        self.request('get', reverse('login'), status=200)
+        self.request('post', reverse('login'), {'username': 'amy', 'password': 'secret'}, status=302)
+
+    def test_profile(self):
+        self.client.force_login(self.user)
+        self.request('get', reverse('profile'), status=200)
+        self.request('post', reverse('profile'), {
+            'first_name': 'Amelia', 'last_name': 'Pond', 'email': 'amy@example.com',
+        }, status=302)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Amelia')
+
+    def test_logout(self):
+        self.client.force_login(self.user)
+        self.request('post', reverse('logout'), status=200)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+class ProfileViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('amy', password='secret')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_save_keeps_changes_made_during_the_request(self):
+        class Form(ProfileUpdateForm):
+            def is_valid(form):
+                # An issue is reported and the thumbnails are attached after
+                # the profile was loaded for this request.
+                make_issue(self.user)
+                Profile.objects.filter(user=self.user).update(thumbnail_jpeg='profile_pics/default.x.160.jpg')
+                return super().is_valid()
+
+        self.client.force_login(self.user)
+        with mock.patch('users.views.ProfileUpdateForm', Form):
+            response = self.client.post(reverse('profile'), {'first_name': 'Amelia', 'email': 'amy@example.com'})
+        self.assertRedirects(response, reverse('profile'), fetch_redirect_response=False)
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual((profile.open_issues, profile.total_issues), (1, 1))
+        self.assertEqual(profile.thumbnail_jpeg.name, 'profile_pics/default.x.160.jpg')
+
+
+class CachedUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('amy', password='secret')
+        cls.permission = Permission.objects.get(codename='view_issue')
+
+    def setUp(self):
+        cache.clear()
+        caches['users'].clear()
+        self.backend = CachedModelBackend()
+
+    def assertCached(self, cached=True):
+        with self.assertNumQueries(0 if cached else 1):
+            return self.backend.get_user(self.user.pk)
+
+    def change(self, change):
+        self.backend.get_user(self.user.pk)
+        self.assertCached()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        return self.assertCached(False)
+
+    def test_password_change(self):
+        def change():
+            self.user.set_password('another-secret')
+            self.user.save()
+        self.assertTrue(self.change(change).check_password('another-secret'))
+
+    def deactivate(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+
+    def test_deactivation(self):
+        self.assertIsNone(self.change(self.deactivate))
+
+    def test_permission_change(self):
+        user = self.change(lambda: self.user.user_permissions.add(self.permission))
+        self.assertTrue(user.has_perm('itreporting.view_issue'))
+        self.assertFalse(self.change(lambda: self.permission.user_set.clear()).has_perm('itreporting.view_issue'))
+
+    def test_group_change(self):
+        group = Group.objects.create(name='technicians')
+        group.permissions.add(self.permission)
+        self.assertTrue(self.change(lambda: group.user_set.add(self.user)).has_perm('itreporting.view_issue'))
+        self.assertFalse(self.change(lambda: self.user.groups.clear()).has_perm('itreporting.view_issue'))
+
+    def test_change_made_in_another_worker(self):
+        self.assertCached(False)
+        # The other worker has its own users cache and shares the default one.
+        other_worker = {**settings.CACHES, 'users': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'other-worker'}}
+        with override_settings(CACHES=other_worker), self.captureOnCommitCallbacks(execute=True):
+            self.deactivate()
+        self.assertIsNone(self.assertCached(False))
+
+    def test_no_password_hash_in_the_shared_cache(self):
+        self.assertCached(False)
+        for value in cache._cache.values():
+            self.assertNotIn(self.user.password.encode(), value)
+            self.assertNotIn(b'pbkdf2', value)
+
+
+def image_data(color='red', size=(320, 200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(STORAGES=BUDGET_SETTINGS['STORAGES'], PROFILE_THUMBNAIL_SIZE=40)
+class ThumbnailTests(TransactionTestCase):
+    # generate() opens and closes its own connections, so it cannot run
+    # inside TestCase's transaction.
+
+    def setUp(self):
+        patcher = mock.patch('users.thumbnails.schedule')
+        self.schedule = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.amy = User.objects.create_user('amy')
+        self.profile = self.upload(self.amy, 'amy.png', image_data())
+
+    def upload(self, user, name, data):
+        profile = Profile.objects.get(user=user)
+        profile.image.save(name, ContentFile(data))
+        return profile
+
+    def test_render(self):
+        rendered = thumbnails.render(image_data(size=(50, 80)), 'profile_pics/amy.png')
+        self.assertEqual(set(rendered), {'thumbnail_webp', 'thumbnail_jpeg'})
+        for field, fmt in (('thumbnail_webp', 'WEBP'), ('thumbnail_jpeg', 'JPEG')):
+            name, data = rendered[field]
+            self.assertRegex(name, r'^profile_pics/amy\.[0-9a-f]{16}\.40\.(webp|jpg)$')
+            with Image.open(io.BytesIO(data)) as thumbnail:
+                self.assertEqual((thumbnail.format, thumbnail.size), (fmt, (40, 40)))
+
+    def test_generate(self):
+        self.assertFalse(self.profile.thumbnails_current())
+        self.assertEqual(self.profile.thumbnail_url, self.profile.image.url)
+        self.assertTrue(thumbnails.generate(self.profile.pk))
+        self.profile.refresh_from_db()
+        self.assertTrue(self.profile.thumbnails_current())
+        self.assertEqual(self.profile.thumbnail_url, self.profile.thumbnail_jpeg.url)
+        self.assertTrue(self.profile.thumbnail_jpeg.storage.exists(self.profile.thumbnail_jpeg.name))
+        # Nothing to do until the image changes.
+        self.assertFalse(thumbnails.generate(self.profile.pk))
+
+    def test_new_image_is_shown_until_its_thumbnails_exist(self):
+        thumbnails.generate(self.profile.pk)
+        self.profile.refresh_from_db()
+        self.profile.image.save('amy-2.png', ContentFile(image_data('blue')))
+        self.assertFalse(self.profile.thumbnails_current())
+        self.assertEqual(self.profile.thumbnail_url, self.profile.image.url)
+        html = render_to_string('users/avatar.html', {'profile': self.profile, 'size': 40})
+        self.assertNotIn('webp', html)
+        self.assertIn(self.profile.image.url, html)
+
+    def test_profiles_with_the_same_image_share_thumbnails(self):
+        thumbnails.generate(self.profile.pk)
+        self.profile.refresh_from_db()
+        rory = User.objects.create_user('rory')
+        Profile.objects.filter(user=rory).update(image=self.profile.image.name)
+        with mock.patch('users.thumbnails.render') as render:
+            self.assertTrue(thumbnails.generate(rory.profile.pk))
+        render.assert_not_called()
+        rory.profile.refresh_from_db()
+        self.assertEqual(rory.profile.thumbnail_jpeg.name, self.profile.thumbnail_jpeg.name)
+
+    def test_image_replaced_while_rendering(self):
+        original = thumbnails.render
+
+        def render(data, image_name):
+            Profile.objects.filter(pk=self.profile.pk).update(image='profile_pics/newer.png')
+            return original(data, image_name)
+
+        with mock.patch('users.thumbnails.render', render):
+            self.assertFalse(thumbnails.generate(self.profile.pk))
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.thumbnail_webp.name, self.profile.thumbnail_jpeg.name), ('', ''))
+
+    def test_scheduled_when_the_image_changes(self):
+        self.schedule.reset_mock()
+        thumbnails.generate(self.profile.pk)
+        # Attaching the thumbnails does not schedule them again.
+        self.schedule.assert_not_called()
+        self.upload(self.amy, 'amy-2.png', image_data('blue'))
+        self.schedule.assert_called_once_with(self.profile.pk)
+
+
+@override_settings(PROVISION_ADMIN_MAX_PASSWORDS=2, STORAGES=BUDGET_SETTINGS['STORAGES'])
+class ProvisionAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='secret')
+
+    def setUp(self):
+        # Users are cached by pk, and earlier tests reuse the same pks.
+        cache.clear()
+
+    def upload(self, rows):
+        self.client.force_login(self.admin)
+        roster = SimpleUploadedFile('roster.csv', ('username,password\n' + rows).encode())
+        return self.client.post(reverse('admin:users_provision'), {'roster': roster})
+
+    def test_small_roster(self):
+        response = self.upload('s1,a-long-passphrase\ns2,\ns3,\n')
+        self.assertRedirects(response, reverse('admin:auth_user_changelist'))
+        self.assertTrue(User.objects.get(username='s1').check_password('a-long-passphrase'))
+        self.assertFalse(User.objects.get(username='s2').has_usable_password())
+
+    def test_too_many_passwords_for_one_request(self):
+        response = self.upload('s1,one-passphrase\ns2,two-passphrase\ns3,three-passphrase\n')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'provision_students')
+        self.assertFalse(User.objects.filter(username__startswith='s').exists())
@@ -0,0 +1,128 @@
+"""
+Profile image thumbnails.
+
+When a profile's image changes, a square WebP thumbnail and a JPEG fallback
+are rendered off the request in a small thread pool and saved next to the
+original. Their names include a hash of the original's content, so they can be
+cached forever and identical uploads (such as the default picture) share one
+set of files.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# field: (extension, Pillow format, save options)
+FORMATS = {
+    'thumbnail_webp': ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    'thumbnail_jpeg': ('jpg', 'JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def thumbnail_size():
+    return getattr(settings, 'PROFILE_THUMBNAIL_SIZE', 160)
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PROFILE_THUMBNAIL_WORKERS', 2),
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def render(data, image_name):
+    """Return {field: (storage name, bytes)} for the thumbnails of an image."""
+    # Pillow is only needed when an image is uploaded, not at startup.
+    from PIL import Image, ImageOps
+
+    size = thumbnail_size()
+    stem = os.path.splitext(image_name)[0]
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    with Image.open(io.BytesIO(data)) as original:
+        thumb = ImageOps.fit(ImageOps.exif_transpose(original).convert('RGBA'),
+                             (size, size), Image.Resampling.LANCZOS)
+    flat = Image.new('RGB', thumb.size, 'white')
+    flat.paste(thumb, mask=thumb.getchannel('A'))
+    thumbnails = {}
+    for field, (extension, fmt, options) in FORMATS.items():
+        buffer = io.BytesIO()
+        (thumb if fmt == 'WEBP' else flat).save(buffer, fmt, **options)
+        thumbnails[field] = (f'{stem}.{digest}.{size}.{extension}', buffer.getvalue())
+    return thumbnails
+
+
+def generate(profile_pk, force=False):
+    """Create and attach thumbnails for a profile's current image."""
+    from users.models import Profile
+
+    close_old_connections()
+    try:
+        profile = Profile.objects.filter(pk=profile_pk).first()
+        if profile is None or (profile.thumbnails_current() and not force):
+            return False
+        image_name = profile.image.name
+        names = None if force else _existing_names(image_name)
+        if names is None:
+            storage = profile.image.storage
+            with storage.open(image_name, 'rb') as image:
+                data = image.read()
+            names = {}
+            for field, (name, content) in render(data, image_name).items():
+                names[field] = name if storage.exists(name) else storage.save(name, ContentFile(content))
+        with transaction.atomic():
+            profile = Profile.objects.select_for_update().filter(pk=profile_pk).first()
+            # The image may have been replaced while this one was rendering.
+            if profile is None or profile.image.name != image_name:
+                return False
+            for field, name in names.items():
+                setattr(profile, field, name)
+            profile.save(update_fields=list(names))
+        return True
+    finally:
+        close_old_connections()
+
+
+def _existing_names(image_name):
+    from users.models import Profile
+
+    done = (Profile.objects.filter(image=image_name).exclude(thumbnail_webp='').exclude(thumbnail_jpeg='')
+            .values('thumbnail_webp', 'thumbnail_jpeg').first())
+    stem = os.path.splitext(image_name)[0] + '.'
+    if done and all(name.startswith(stem) for name in done.values()):
+        return done
+    return None
+
+
+def _generate_logged(profile_pk):
+    try:
+        return generate(profile_pk)
+    except Exception:
+        logger.exception('Could not create thumbnails for profile %s', profile_pk)
+        return False
+
+
+def schedule(profile_pk):
+    return executor().submit(_generate_logged, profile_pk)
+
+
+def profile_saved(sender, instance, update_fields=None, **kwargs):
+    """post_save receiver for Profile: queue thumbnails once the image is committed."""
+    if update_fields and set(update_fields) <= set(FORMATS):
+        return
+    if not instance.thumbnails_current():
+        transaction.on_commit(lambda: schedule(instance.pk))
@@ -2,10 +2,13 @@ from django.shortcuts import render,redirect
 from django.contrib import messages
 from .forms import UserRegisterForm    
 from django.contrib.auth.decorators import login_required 
+from django.db import transaction
 from django.shortcuts import render, redirect
 from users.forms import UserRegisterForm, UserUpdateForm, ProfileUpdateForm
+from itapps.querybudget import query_budget
 
 
+@query_budget(5)
 def register(request):
     if request.method == 'POST':
         form = UserRegisterForm(request.POST)
@@ -24,21 +27,24 @@ def register(request):
    
 
 
+# The POST path saves both forms and refreshes the author's cached report rows.
+@query_budget(8)
 @login_required 
 def profile(request): 
-    return render(request, 'users/profile.html', {'title':'Student Profile'})
     if request.method=='POST':
         u_form=UserUpdateForm(request.POST, instance=request.user)
-        p_form=ProfileUpdateForm(request.POST, request.FILES, insatnce=request.user.profile)
-
-    if u_form.is_valid()and p_form.is_valid():
-        u_form.save()
-        p_form.save
-        messages.success(request,'Your account has been successfully updated!')
-        return redirect('profile')
+        p_form=ProfileUpdateForm(request.POST, request.FILES, instance=request.user.profile)
+
+        if u_form.is_valid() and p_form.is_valid():
+            with transaction.atomic():
+                u_form.save()
+                # Only the image: the issue counts and thumbnails loaded with
+                # the profile may have changed since.
+                p_form.save(commit=False).save(update_fields=['image'])
+            messages.success(request,'Your account has been successfully updated!')
+            return redirect('profile')
     else:
        u_form = UserUpdateForm(instance=request.user)
        p_form = ProfileUpdateForm(instance=request.user.profile)
-       context={'u_form':u_form,'p_form':p_form,'title':'Student Profile'}
-       return render(request, 'user/profile.html', context)
-
+    context={'u_form':u_form,'p_form':p_form,'title':'Student Profile'}
+    return render(request, 'users/profile.html', context)